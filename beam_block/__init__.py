@@ -7,5 +7,6 @@ Beam Block Subpackages
 # import subpackages
 from . import config
 from . import core
+from . import io
 from . import retrieve
 from . import testing
@@ -16,10 +16,38 @@ Core Functions
     beam_block
     beam_block_flags
     json_beam_block
+    lazy_beam_block
+    preview_beam_block
+    progressive_beam_block
+    fused_beam_block_frac
+    beam_block_correction
+    correct_beam_block
+    build_dem_pyramid
+    load_dem_pyramid
+    pyramid_gate_levels
+    polar_to_raster_xy
+    encode_blockage
+    decode_blockage
+    blockage_lookup
+    build_tile_index
+    write_tile_manifest
+    load_dem_mosaic
+    read_dem_tiles
 
 """
 
 from .beam_block_radar import beam_block, beam_block_flags
 from .beam_block_json import json_beam_block
+from .beam_block_lazy import lazy_beam_block
+from .beam_block_preview import preview_beam_block, progressive_beam_block
+from .beam_block_kernel import fused_beam_block_frac
+from .beam_block_correct import beam_block_correction, correct_beam_block
+from .dem_pyramid import build_dem_pyramid, load_dem_pyramid
+from .dem_pyramid import pyramid_gate_levels
+from .georef import polar_to_raster_xy
+from .sparse_blockage import encode_blockage, decode_blockage
+from .sparse_blockage import blockage_lookup
+from .dem_tiles import build_tile_index, write_tile_manifest
+from .dem_tiles import load_dem_mosaic, read_dem_tiles
 
 __all__ = [s for s in dir() if not s.startswith('_')]
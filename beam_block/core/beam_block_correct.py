@@ -0,0 +1,204 @@
+"""
+beam_block.core.beam_block_correct
+==================================
+
+Corrects radar moments for beam blockage using cached beam block
+fractions. Reflectivity at partially blocked gates is increased by the
+power lost to the blockage and gates that are too blocked to correct
+are masked. The correction is calculated once from the beam block
+fractions and flags, then applied to every incoming volume with the
+same scan strategy as a single vectorized array operation, after each
+incoming ray is matched to the cached ray with the nearest pointing
+angles in the same sweep.
+
+.. autosummary::
+    :toctreeL generated/
+    :template: dev_template.rst
+
+    beam_block_correction
+    correct_beam_block
+
+"""
+
+import numpy as np
+import pyart
+
+
+def beam_block_correction(block_all, block_flags=None, max_block=0.5,
+                          mask_flags=(2, )):
+    """
+    Beam Block Reflectivity Correction Calculation
+
+    Parameters
+    ----------
+    block_all : array
+        Array of beam block fractions used for the correction, usually
+        the cumulative beam block fractions from beam_block.
+
+    Other Parameters
+    ----------------
+    block_flags : array
+        Array of beam block flags from beam_block_flags, usually the
+        cumulative beam block flags. Default is None, which does not
+        use flags.
+    max_block : float
+        Largest beam block fraction that is corrected. Gates with more
+        blockage are masked. Default value is 0.5, which corrects by
+        at most about 3 dB.
+    mask_flags : sequence of int
+        Flag values of block_flags where gates are masked. Default is
+        (2, ), complete blockage.
+
+    Returns
+    -------
+    correction : MaskedArray
+        Array of corrections in dB to add to reflectivity, masked at
+        gates that should be removed from all moments.
+
+    References
+    ----------
+    Bech, J., B. Codina, J. Lorente, and D. Bebbington,
+    2003: The sensitivity of single polarization weather
+    radar beam blockage correction to variability in the
+    vertical refractivity gradient. J. Atmos. Oceanic
+    Technol., 20, 845–855
+
+    """
+    block_all = np.ma.masked_invalid(block_all)
+    mask = np.ma.getmaskarray(block_all) | (
+        np.ma.getdata(block_all) > max_block)
+    if block_flags is not None:
+        mask |= np.isin(np.ma.filled(block_flags, -1), mask_flags)
+
+    # Power lost to the blockage is made up by dividing by the unblocked
+    # fraction of the beam, 10 * log10(1 / (1 - block)) in dB.
+    with np.errstate(invalid='ignore', divide='ignore'):
+        correction = -10.0 * np.log10(
+            1.0 - np.clip(np.ma.getdata(block_all), 0.0, max_block))
+    return np.ma.MaskedArray(correction, mask=mask)
+
+
+def correct_beam_block(radar, correction, refl_fields=None,
+                       mask_fields=None, block_radar=None,
+                       max_angle_diff=1.0):
+    """
+    Correct radar moments for beam blockage in place.
+
+    Parameters
+    ----------
+    radar : Radar
+        Radar object with the moments to correct. The fields are
+        changed in place.
+    correction : MaskedArray
+        Array of corrections in dB created from beam_block_correction.
+
+    Other Parameters
+    ----------------
+    refl_fields : list of str
+        Names of the reflectivity fields the correction in dB is added
+        to. Masked correction gates are masked in these fields. Default
+        is None, which uses Py-ART's default reflectivity field name, or
+        DBZ as in CF/Radial files, whichever is in the radar. A
+        ValueError is raised when neither is.
+    mask_fields : list of str
+        Names of other fields that are not corrected but have the gates
+        masked where the correction is masked. Default is None, which
+        masks no other fields.
+    block_radar : Radar
+        Radar object with the scan geometry the correction was
+        calculated for, such as the radar of the beam block file. Each
+        ray of radar is corrected with the correction of the block_radar
+        ray with the nearest azimuth and elevation in the sweep with the
+        nearest fixed angle, so volumes whose sweeps start at another
+        azimuth are corrected correctly. Default is None, which requires
+        the correction to have the shape of the radar and applies it ray
+        by ray.
+    max_angle_diff : float
+        Largest difference in degrees between the fixed angles of
+        matched sweeps and the azimuths and elevations of matched rays.
+        A ValueError is raised when a ray has no match. Default value
+        is 1.0.
+
+    Returns
+    -------
+    radar : Radar
+        The same radar object with the corrected fields.
+
+    """
+    if block_radar is not None:
+        if correction.shape != (block_radar.nrays, block_radar.ngates):
+            raise ValueError(
+                'Correction shape %s does not match the block radar '
+                'shape %s.' % (correction.shape,
+                               (block_radar.nrays, block_radar.ngates)))
+        if (block_radar.ngates != radar.ngates or not np.allclose(
+                block_radar.range['data'], radar.range['data'])):
+            raise ValueError(
+                'Radar range gates do not match the block radar gates.')
+        correction = correction[
+            _match_rays(block_radar, radar, max_angle_diff)]
+    if correction.shape != (radar.nrays, radar.ngates):
+        raise ValueError(
+            'Correction shape %s does not match the radar shape %s.' % (
+                correction.shape, (radar.nrays, radar.ngates)))
+    if refl_fields is None:
+        names = [pyart.config.get_field_name('reflectivity'), 'DBZ']
+        refl_fields = [name for name in names if name in radar.fields][:1]
+        if not refl_fields:
+            raise ValueError(
+                'No reflectivity field %s in the radar, give the '
+                'refl_fields to correct.' % ' or '.join(names))
+    if mask_fields is None:
+        mask_fields = []
+
+    mask = np.ma.getmaskarray(correction)
+    correction_db = np.ma.filled(correction, 0.0)
+    for field in refl_fields:
+        data = np.ma.asanyarray(radar.fields[field]['data'])
+        data += correction_db
+        data[mask] = np.ma.masked
+        radar.fields[field]['data'] = data
+    for field in mask_fields:
+        data = np.ma.asanyarray(radar.fields[field]['data'])
+        data[mask] = np.ma.masked
+        radar.fields[field]['data'] = data
+    return radar
+
+
+def _match_rays(block_radar, radar, max_angle_diff):
+    """ Returns the index of the block_radar ray matching each ray of
+    radar, raising a ValueError when a ray has no match within
+    max_angle_diff degrees. """
+    block_angles = block_radar.fixed_angle['data']
+    ray_index = np.empty(radar.nrays, dtype=np.intp)
+    for sweep in range(radar.nsweeps):
+        start = radar.sweep_start_ray_index['data'][sweep]
+        end = radar.sweep_end_ray_index['data'][sweep] + 1
+        angle_diff = np.abs(block_angles - radar.fixed_angle['data'][sweep])
+        block_sweep = np.argmin(angle_diff)
+        if angle_diff[block_sweep] > max_angle_diff:
+            raise ValueError(
+                'No block radar sweep matches the fixed angle %.2f.' % (
+                    radar.fixed_angle['data'][sweep]))
+        block_start = block_radar.sweep_start_ray_index['data'][block_sweep]
+        block_end = block_radar.sweep_end_ray_index['data'][block_sweep] + 1
+
+        # Azimuth differences wrap around north.
+        az_diff = np.abs((
+            radar.azimuth['data'][start:end, np.newaxis]
+            - block_radar.azimuth['data'][np.newaxis, block_start:block_end]
+            + 180.0) % 360.0 - 180.0)
+        el_diff = np.abs(
+            radar.elevation['data'][start:end, np.newaxis]
+            - block_radar.elevation['data'][
+                np.newaxis, block_start:block_end])
+        nearest = np.argmin(np.hypot(az_diff, el_diff), axis=1)
+        rays = np.arange(end - start)
+        unmatched = ((az_diff[rays, nearest] > max_angle_diff)
+                     | (el_diff[rays, nearest] > max_angle_diff))
+        if unmatched.any():
+            raise ValueError(
+                '%d rays of sweep %d have no block radar ray within %.2f '
+                'degrees.' % (unmatched.sum(), sweep, max_angle_diff))
+        ray_index[start:end] = block_start + nearest
+    return ray_index
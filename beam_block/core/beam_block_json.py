@@ -27,6 +27,8 @@ import json
 import numpy as np
 import wradlib as wrl
 
+from .beam_block_radar import _read_raster, _sweep_beam_block
+
 
 def json_beam_block(json_data, tif_file,
                     beam_width=1.0):
@@ -79,59 +81,34 @@ def json_beam_block(json_data, tif_file,
 
     variables = json_data['variables']
 
-    # Opening the tif file and getting the values ready to be
-    # converted into polar values.
-    rasterfile = tif_file
-    data_raster = wrl.io.open_raster(rasterfile)
-    rastervalues, rastercoords, proj = wrl.georef.extract_raster_dataset(
-        data_raster, nodata=None)
     sitecoords = (np.float(variables['longitude']['data']),
                   np.float(variables['latitude']['data']),
                   np.float(variables['altitude']['data']))
+    _range = np.array(json.loads(variables['range']['data']))
+
+    # Opening the tif file and getting the values ready to be
+    # converted into polar values.
+    rastervalues, rastercoords, proj = _read_raster(
+        tif_file, sitecoords, np.max(_range))
 
     pbb_arrays = []
     cbb_arrays = []
-    _range = np.array(json.loads(variables['range']['data']))
+    all_elevs = np.array(json.loads(variables['elevation']['data']))
+    all_azimuths = np.array(json.loads(variables['azimuth']['data']))
+    starts = np.array(json.loads(variables['sweep_start_ray_index']['data']))
+    ends = np.array(json.loads(variables['sweep_end_ray_index']['data']))
     # Cycling through all sweeps in the radar object.
     beamradius = wrl.util.half_power_radius(_range, beam_width)
-    for i in range(
-            len(np.array(
-                json.loads(variables['sweep_start_ray_index']['data'])))):
-        index_start = np.array(
-            json.loads(variables['sweep_start_ray_index']['data']))[i]
-        index_end = np.array(
-            json.loads(variables['sweep_end_ray_index']['data']))[i] + 1
-
-        elevs = np.array(
-            json.loads(
-                variables['elevation']['data']))[index_start:index_end]
-        azimuths = np.array(
-            json.loads(
-                variables['azimuth']['data']))[index_start:index_end]
-        rg, azg = np.meshgrid(_range, azimuths)
-        rg, eleg = np.meshgrid(_range, elevs)
-        lon, lat, alt = wrl.georef.polar2lonlatalt_n(
-            rg, azg, eleg, sitecoords)
-
-        x_pol, y_pol = wrl.georef.reproject(
-            lon, lat, projection_target=proj)
-        polcoords = np.dstack((x_pol, y_pol))
-        rlimits = (x_pol.min(), y_pol.min(), x_pol.max(), y_pol.max())
-        ind = wrl.util.find_bbox_indices(rastercoords, rlimits)
-        rastercoords = rastercoords[0:ind[3], ind[0]:ind[2], ...]
-        rastervalues = rastervalues[0:ind[3], ind[0]:ind[2]]
-
-        # Map rastervalues to polar grid points.
-        polarvalues = wrl.ipol.cart2irregular_spline(
-            rastercoords, rastervalues, polcoords)
-
-        # Calculate partial beam blockage using wradlib.
-        pbb = wrl.qual.beam_block_frac(polarvalues, alt, beamradius)
-        pbb = np.ma.masked_invalid(pbb)
+    for i in range(len(starts)):
+        index_start = starts[i]
+        index_end = ends[i] + 1
+
+        elevs = all_elevs[index_start:index_end]
+        azimuths = all_azimuths[index_start:index_end]
+        pbb, cbb = _sweep_beam_block(
+            _range, azimuths, elevs, sitecoords, rastervalues,
+            rastercoords, proj, beamradius)
         pbb_arrays.append(pbb)
-
-        # Calculate cumulative beam blockage using wradlib.
-        cbb = wrl.qual.cum_beam_block_frac(pbb)
         cbb_arrays.append(cbb)
 
     # Stacks all sweeps blockage data.
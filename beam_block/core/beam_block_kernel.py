@@ -0,0 +1,150 @@
+"""
+beam_block.core.beam_block_kernel
+=================================
+
+Fused partial beam block (PBB) and cumulative beam block (CBB) kernel.
+Calculates the same values as wradlib's beam_block_frac followed by
+numpy's masked_invalid and wradlib's cum_beam_block_frac, but in a
+single pass that writes into preallocated output arrays instead of
+allocating full size temporaries for every step. When numba is
+available a compiled loop is used, otherwise a chain of numpy ufuncs
+with out arguments.
+
+.. autosummary::
+    :toctreeL generated/
+    :template: dev_template.rst
+
+    fused_beam_block_frac
+
+"""
+
+import numpy as np
+
+try:
+    import numba
+    _NUMBA_AVAILABLE = True
+except ImportError:
+    _NUMBA_AVAILABLE = False
+
+
+def fused_beam_block_frac(terrainheight, beamheight, beamradius,
+                          pbb=None, cbb=None, use_numba=None):
+    """
+    Fused Beam Block Fraction Calculation
+
+    Parameters
+    ----------
+    terrainheight : array
+        Array of terrain heights at each gate with shape
+        (rays, gates).
+    beamheight : array
+        Array of beam heights at each gate, same shape as
+        terrainheight.
+    beamradius : array
+        Half power beam radius at each gate, broadcastable to the shape
+        of terrainheight.
+
+    Other Parameters
+    ----------------
+    pbb : array
+        Float64 array to write the partial beam block fractions into.
+        This can be the terrainheight array when it is not needed
+        afterwards. Default is None, which allocates a new array.
+    cbb : array
+        Float64 array to write the cumulative beam block fractions
+        into. This can be the beamheight array when it is not needed
+        afterwards. Default is None, which allocates a new array.
+    use_numba : bool
+        True to use the numba kernel, False to use the numpy kernel.
+        Default is None, which uses numba when it is available.
+
+    Returns
+    -------
+    pbb : MaskedArray
+        Array of partial beam block fractions, masked where the
+        terrain is not within the beam or the inputs are invalid.
+    cbb : array
+        Array of cumulative beam block fractions, the maximum PBB of
+        all valid gates up to and including each gate along the ray.
+
+    References
+    ----------
+    Bech, J., B. Codina, J. Lorente, and D. Bebbington,
+    2003: The sensitivity of single polarization weather
+    radar beam blockage correction to variability in the
+    vertical refractivity gradient. J. Atmos. Oceanic
+    Technol., 20, 845–855
+
+    """
+    terrainheight = np.asarray(terrainheight)
+    shape = terrainheight.shape
+    if pbb is None:
+        pbb = np.empty(shape, dtype='float64')
+    if cbb is None:
+        cbb = np.empty(shape, dtype='float64')
+    mask = np.empty(shape, dtype=bool)
+
+    if use_numba is None:
+        use_numba = _NUMBA_AVAILABLE
+    if use_numba:
+        if not _NUMBA_AVAILABLE:
+            raise ImportError('numba is required when use_numba is True.')
+        _fused_kernel_numba(
+            terrainheight, np.broadcast_to(beamheight, shape),
+            np.broadcast_to(beamradius, shape), pbb, cbb, mask)
+    else:
+        _fused_kernel_numpy(
+            terrainheight, beamheight, beamradius, pbb, cbb, mask)
+    return np.ma.MaskedArray(pbb, mask=mask, copy=False), cbb
+
+
+def _fused_kernel_numpy(terrainheight, beamheight, beamradius, pbb, cbb,
+                        mask):
+    """ Numpy kernel, using cbb as scratch space before it is filled. """
+    with np.errstate(invalid='ignore', divide='ignore'):
+        # Height of the terrain above the beam center in beam radii,
+        # (Bech et al. (2003), Fig.3). Gates where the terrain is more
+        # than a beam radius from the beam center become NaN below,
+        # the same as in wradlib.
+        np.subtract(terrainheight, beamheight, out=pbb)
+        np.divide(pbb, beamradius, out=pbb)
+
+        # PBB = (ya * sqrt(1 - ya**2) + arcsin(ya) + pi / 2) / pi
+        np.multiply(pbb, pbb, out=cbb)
+        np.subtract(1.0, cbb, out=cbb)
+        np.sqrt(cbb, out=cbb)
+        np.multiply(cbb, pbb, out=cbb)
+        np.arcsin(pbb, out=pbb)
+        np.add(pbb, cbb, out=pbb)
+        np.add(pbb, np.pi / 2.0, out=pbb)
+        np.divide(pbb, np.pi, out=pbb)
+    np.isnan(pbb, out=mask)
+
+    # CBB is the running maximum of the valid PBB values along the ray,
+    # starting from no blockage.
+    np.fmax.accumulate(pbb, axis=-1, out=cbb)
+    np.copyto(cbb, 0.0, where=np.isnan(cbb))
+
+
+if _NUMBA_AVAILABLE:
+    @numba.njit(nogil=True, cache=True, error_model='numpy')
+    def _fused_kernel_numba(terrainheight, beamheight, beamradius, pbb,
+                            cbb, mask):
+        """ Numba kernel, a single loop over every gate. """
+        nrays, ngates = terrainheight.shape
+        for i in range(nrays):
+            premax = 0.0
+            for j in range(ngates):
+                ya = (terrainheight[i, j] - beamheight[i, j]) / \
+                    beamradius[i, j]
+                if abs(ya) <= 1.0:
+                    value = (ya * np.sqrt(1.0 - ya * ya) + np.arcsin(ya)
+                             + np.pi / 2.0) / np.pi
+                    pbb[i, j] = value
+                    mask[i, j] = False
+                    if value > premax:
+                        premax = value
+                else:
+                    pbb[i, j] = np.nan
+                    mask[i, j] = True
+                cbb[i, j] = premax
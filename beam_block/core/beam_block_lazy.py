@@ -0,0 +1,160 @@
+"""
+beam_block.core.beam_block_lazy
+===============================
+
+Lazily evaluated beam block calculation. Instead of computing every
+sweep and returning two concatenated arrays, the PBB, CBB and flag
+fields are returned as an xarray Dataset backed by dask arrays that are
+chunked per sweep. Only the chunks that are accessed are calculated and
+full evaluation runs the chunks in parallel.
+
+.. autosummary::
+    :toctreeL generated/
+    :template: dev_template.rst
+
+    lazy_beam_block
+
+"""
+
+import numpy as np
+import wradlib as wrl
+
+try:
+    import dask
+    import dask.array as da
+    import xarray as xr
+    _DASK_AVAILABLE = True
+except ImportError:
+    _DASK_AVAILABLE = False
+
+from ..config import dict_config
+from .beam_block_radar import _read_raster, _sweep_beam_block
+from .beam_block_radar import beam_block_flags
+
+
+def lazy_beam_block(radar, tif_file, beam_width=1.0, rays_per_chunk=None,
+                    no_block_thresh=0.01, complete_block_thresh=0.95):
+    """
+    Lazy Beam Block Radar Calculation
+
+    Parameters
+    ----------
+    radar : Radar
+        Radar object used. Unlike beam_block, the radar fields are
+        left untouched.
+    tif_file : string
+        Name of geotiff file to use for the
+        calculation
+
+    Other Parameters
+    ----------------
+    beam_width : float
+        Radar's beam width for calculation.
+        Default value is 1.0.
+    rays_per_chunk : int
+        Largest number of rays in a chunk. Sweeps with more rays are
+        split into several chunks so selecting an azimuth sector only
+        calculates the chunks covering it. Default is None, which uses
+        one chunk per sweep.
+    no_block_thresh : float
+        Value for the cutoff for no blockage flag value of 0. Default
+        value is 0.01.
+    complete_block_thresh : float
+        Value for the cutoff for complete blockage flag value of 2.
+        Default value is 0.95.
+
+    Returns
+    -------
+    dataset : Dataset
+        xarray Dataset with dimensions time (rays) and range, holding
+        the partial_beam_block, cumulative_beam_block,
+        partial_beam_block_flags and cumulative_beam_block_flags
+        variables as dask arrays. Invalid gates are NaN. The azimuth,
+        elevation and sweep_number coordinates along time can be used
+        to select sweeps or azimuth sectors, and the
+        sweep_start_ray_index and sweep_end_ray_index variables give
+        the sweep boundaries.
+
+    Note
+    ----
+    Calling compute, load or persist on the dataset evaluates all
+    fields of the selected chunks at once. Computing the fields one at
+    a time calculates the chunks again for every field.
+
+    """
+    if not _DASK_AVAILABLE:
+        raise ImportError(
+            'xarray and dask are required to use lazy_beam_block.')
+
+    sitecoords = (np.float(radar.longitude['data']),
+                  np.float(radar.latitude['data']),
+                  np.float(radar.altitude['data']))
+    _range = np.asarray(radar.range['data'])
+    ngates = len(_range)
+    beamradius = wrl.util.half_power_radius(_range, beam_width)
+    azimuth = np.asarray(radar.azimuth['data'])
+    elevation = np.asarray(radar.elevation['data'])
+    starts = np.asarray(radar.sweep_start_ray_index['data'])
+    ends = np.asarray(radar.sweep_end_ray_index['data'])
+
+    # The raster is only opened when the first chunk is calculated and
+    # is then shared by all chunks.
+    raster = dask.delayed(_read_raster, pure=True)(
+        tif_file, sitecoords, np.max(_range))
+
+    chunks = []
+    sweep_number = np.empty(len(azimuth), dtype='int32')
+    for i in range(len(starts)):
+        index_start = starts[i]
+        index_end = ends[i] + 1
+        sweep_number[index_start:index_end] = i
+        step = index_end - index_start
+        if rays_per_chunk is not None:
+            step = min(step, rays_per_chunk)
+        for chunk_start in range(index_start, index_end, step):
+            chunk_end = min(chunk_start + step, index_end)
+            block = dask.delayed(_chunk_beam_block, pure=True)(
+                raster, _range, azimuth[chunk_start:chunk_end],
+                elevation[chunk_start:chunk_end], sitecoords, beamradius,
+                no_block_thresh, complete_block_thresh)
+            chunks.append(da.from_delayed(
+                block, shape=(4, chunk_end - chunk_start, ngates),
+                dtype='float64'))
+    stacked = da.concatenate(chunks, axis=1)
+
+    dims = ('time', 'range')
+    data_vars = {}
+    to_dicts = (dict_config.pbb_to_dict, dict_config.cbb_to_dict,
+                dict_config.pbb_flags_to_dict, dict_config.cbb_flags_to_dict)
+    for i, to_dict in enumerate(to_dicts):
+        attrs = to_dict(None)
+        attrs.pop('data')
+        data_vars[attrs['standard_name']] = xr.Variable(
+            dims, stacked[i], attrs=attrs)
+    data_vars['sweep_start_ray_index'] = xr.Variable(('sweep', ), starts)
+    data_vars['sweep_end_ray_index'] = xr.Variable(('sweep', ), ends)
+    coords = {'range': ('range', _range),
+              'azimuth': ('time', azimuth),
+              'elevation': ('time', elevation),
+              'sweep_number': ('time', sweep_number)}
+    return xr.Dataset(data_vars, coords=coords)
+
+
+def _chunk_beam_block(raster, _range, azimuths, elevs, sitecoords,
+                      beamradius, no_block_thresh, complete_block_thresh):
+    """ Calculates PBB, CBB and their flags for one chunk of rays and
+    returns them stacked in a single array with NaN for invalid gates. """
+    rastervalues, rastercoords, proj = raster
+    pbb, cbb = _sweep_beam_block(
+        _range, azimuths, elevs, sitecoords, rastervalues, rastercoords,
+        proj, beamradius)
+    pbb = np.ma.masked_invalid(pbb)
+    cbb = np.ma.masked_invalid(cbb)
+    pbb_flags, cbb_flags = beam_block_flags(
+        pbb, cbb, no_block_thresh, complete_block_thresh)
+    block = np.empty((4, ) + pbb.shape, dtype='float64')
+    fields = ((pbb, pbb), (cbb, cbb), (pbb_flags, pbb), (cbb_flags, cbb))
+    for i, (data, valid) in enumerate(fields):
+        block[i] = np.ma.filled(
+            np.ma.masked_where(np.ma.getmaskarray(valid), data), np.nan)
+    return block
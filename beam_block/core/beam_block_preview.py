@@ -0,0 +1,274 @@
+"""
+beam_block.core.beam_block_preview
+==================================
+
+Quick look beam block calculation for interactive use. The PBB and CBB
+are calculated on every Nth ray and gate of each sweep, or at a target
+size, and upsampled to the full radar grid, together with an estimate of
+the CBB error. A progressive mode refines the preview step by step up to
+the full resolution result, only calculating the gates that earlier
+steps did not.
+
+.. autosummary::
+    :toctreeL generated/
+    :template: dev_template.rst
+
+    preview_beam_block
+    progressive_beam_block
+
+"""
+
+import numpy as np
+import wradlib as wrl
+
+from .beam_block_radar import _read_raster, _sweep_beam_block
+
+
+def preview_beam_block(radar, tif_file, beam_width=1.0, ray_step=4,
+                       gate_step=4, shape=None):
+    """
+    Preview Beam Block Radar Calculation
+
+    Parameters
+    ----------
+    radar : Radar
+        Radar object used. Unlike beam_block, the radar fields are
+        left untouched.
+    tif_file : string
+        Name of geotiff file to use for the
+        calculation.
+
+    Other Parameters
+    ----------------
+    beam_width : float
+        Radar's beam width for calculation.
+        Default value is 1.0.
+    ray_step : int
+        Calculate every ray_step ray of each sweep. Default value is 4.
+    gate_step : int
+        Calculate every gate_step gate of each ray. Default value is 4.
+    shape : tuple
+        Target number of rays per sweep and gates to calculate, used
+        instead of ray_step and gate_step. Default is None.
+
+    Returns
+    -------
+    pbb_all : array
+        Array of partial beam block fractions for each
+        gate in all sweeps, upsampled from the calculated gates.
+    cbb_all : array
+        Array of cumulative beam block fractions for
+        each gate in all sweeps, upsampled from the calculated gates.
+    cbb_error : array
+        Array of estimated CBB errors for each gate in all sweeps. This
+        is the spread of the calculated CBB values around the gate plus
+        the running maximum along the ray of the spread of the
+        calculated PBB values, so blockage that can lie between the
+        calculated gates is carried down range like the CBB itself.
+
+    Note
+    ----
+    The first and last ray of each sweep and the first and last gate
+    are always calculated, so the upsampling never extrapolates. The
+    CBB of the calculated gates can miss terrain features narrower than
+    the gate step, which biases the preview CBB low down range of them.
+    The error estimate covers this on average, but not at every gate.
+
+    """
+    _range = radar.range['data']
+    sitecoords = (np.float(radar.longitude['data']),
+                  np.float(radar.latitude['data']),
+                  np.float(radar.altitude['data']))
+    raster = _read_raster(tif_file, sitecoords, np.max(_range))
+    return _preview(radar, raster, sitecoords, beam_width, ray_step,
+                    gate_step, shape)
+
+
+def progressive_beam_block(radar, tif_file, beam_width=1.0,
+                           steps=(8, 4, 2, 1)):
+    """
+    Progressively refined beam block calculation.
+
+    Parameters
+    ----------
+    radar : Radar
+        Radar object used. Unlike beam_block, the radar fields are
+        left untouched.
+    tif_file : string
+        Name of geotiff file to use for the
+        calculation.
+
+    Other Parameters
+    ----------------
+    beam_width : float
+        Radar's beam width for calculation.
+        Default value is 1.0.
+    steps : sequence of int
+        Ray and gate steps of the successive previews. Default is
+        (8, 4, 2, 1), which ends at the full resolution.
+
+    Yields
+    ------
+    step : int
+        Ray and gate step of the preview.
+    pbb_all, cbb_all, cbb_error : array
+        Preview PBB, CBB and estimated CBB error arrays, see
+        preview_beam_block. With a step of 1 these are the full
+        resolution PBB and CBB and the error is zero.
+
+    Note
+    ----
+    The raster is only read once and the PBB of every gate calculated
+    at an earlier step is reused, so with steps that divide each other,
+    as in the default, all steps together calculate each gate of the
+    radar at most once and cost about the same as the full resolution
+    beam_block. The CBB of each step is accumulated from the PBB of its
+    gates. The generator can be stopped as soon as the error is small
+    enough, so the costly fine steps are only run when needed.
+
+    """
+    _range = radar.range['data']
+    sitecoords = (np.float(radar.longitude['data']),
+                  np.float(radar.latitude['data']),
+                  np.float(radar.altitude['data']))
+    raster = _read_raster(tif_file, sitecoords, np.max(_range))
+
+    # PBB of every sweep gate and whether it is calculated yet, shared
+    # by all steps.
+    known = []
+    for i in range(len(radar.sweep_start_ray_index['data'])):
+        sweep_shape = (radar.sweep_end_ray_index['data'][i] + 1
+                       - radar.sweep_start_ray_index['data'][i], len(_range))
+        known.append((np.full(sweep_shape, np.nan),
+                      np.zeros(sweep_shape, dtype=bool)))
+    for step in steps:
+        pbb_all, cbb_all, cbb_error = _preview(
+            radar, raster, sitecoords, beam_width, step, step, None, known)
+        yield step, pbb_all, cbb_all, cbb_error
+
+
+def _preview(radar, raster, sitecoords, beam_width, ray_step, gate_step,
+             shape, known=None):
+    """ Calculates the preview PBB, CBB and CBB error arrays from an
+    already read raster. When known holds the PBB and calculated gates
+    of each sweep, only the other gates are calculated and known is
+    updated with them. """
+    rastervalues, rastercoords, proj = raster
+    _range = radar.range['data']
+    if shape is not None:
+        ray_step = max(int(np.ceil(
+            np.max(radar.rays_per_sweep['data']) / float(shape[0]))), 1)
+        gate_step = max(int(np.ceil(len(_range) / float(shape[1]))), 1)
+    gates = _sample_index(len(_range), gate_step)
+    beamradius = wrl.util.half_power_radius(_range[gates], beam_width)
+
+    pbb_arrays = []
+    cbb_arrays = []
+    error_arrays = []
+    for i in range(len(radar.sweep_start_ray_index['data'])):
+        index_start = radar.sweep_start_ray_index['data'][i]
+        index_end = radar.sweep_end_ray_index['data'][i] + 1
+        rays = _sample_index(index_end - index_start, ray_step)
+
+        elevs = radar.elevation['data'][index_start:index_end]
+        azimuths = radar.azimuth['data'][index_start:index_end]
+        if known is None:
+            pbb, cbb = _sweep_beam_block(
+                _range[gates], azimuths[rays], elevs[rays], sitecoords,
+                rastervalues, rastercoords, proj, beamradius)
+        else:
+            pbb, cbb = _known_sweep_beam_block(
+                known[i], rays, gates, _range, azimuths, elevs,
+                sitecoords, raster, beamradius)
+
+        sweep_shape = (index_end - index_start, len(_range))
+        pbb_arrays.append(np.ma.masked_invalid(_upsample(
+            np.ma.filled(pbb, np.nan), rays, gates, sweep_shape)))
+        cbb_arrays.append(_upsample(cbb, rays, gates, sweep_shape))
+        error_arrays.append(_cbb_error(pbb, cbb, rays, gates, sweep_shape))
+
+    pbb_all = np.ma.concatenate(pbb_arrays)
+    cbb_all = np.ma.concatenate(cbb_arrays)
+    cbb_error = np.concatenate(error_arrays)
+    return pbb_all, cbb_all, cbb_error
+
+
+def _known_sweep_beam_block(known, rays, gates, _range, azimuths, elevs,
+                            sitecoords, raster, beamradius):
+    """ Returns the PBB and CBB arrays of the sampled rays and gates of a
+    sweep, calculating only the gates that are not known yet. """
+    rastervalues, rastercoords, proj = raster
+    pbb_known, done = known
+    sampled_done = done[np.ix_(rays, gates)]
+
+    # Rays not calculated before need all sampled gates, rays that were
+    # need the sampled gates that are new to any of them.
+    new_rays = ~sampled_done.any(axis=1)
+    new_gates = ~sampled_done[~new_rays].all(axis=0)
+    for ray_index, gate_index in ((rays[new_rays], gates),
+                                  (rays[~new_rays], gates[new_gates])):
+        if len(ray_index) and len(gate_index):
+            beam_index = np.searchsorted(gates, gate_index)
+            pbb = _sweep_beam_block(
+                _range[gate_index], azimuths[ray_index], elevs[ray_index],
+                sitecoords, rastervalues, rastercoords, proj,
+                beamradius[beam_index])[0]
+            pbb_known[np.ix_(ray_index, gate_index)] = np.ma.filled(
+                pbb, np.nan)
+            done[np.ix_(ray_index, gate_index)] = True
+
+    # CBB is the running maximum of the valid PBB values along the ray,
+    # the same as in fused_beam_block_frac.
+    pbb = np.ma.masked_invalid(pbb_known[np.ix_(rays, gates)])
+    cbb = np.fmax.accumulate(np.ma.filled(pbb, np.nan), axis=1)
+    cbb[np.isnan(cbb)] = 0.0
+    return pbb, cbb
+
+
+def _sample_index(size, step):
+    """ Returns every step index up to size, always including the last
+    index. """
+    return np.unique(np.append(np.arange(0, size, step), size - 1))
+
+
+def _bracket(index, size):
+    """ Returns the calculated indices at or before and at or after each
+    index up to size, and the interpolation weight of the latter. """
+    full = np.arange(size)
+    right = np.searchsorted(index, full)
+    left = np.where(index[right] == full, right, right - 1)
+    span = np.maximum(index[right] - index[left], 1)
+    weight = (full - index[left]) / span.astype('float64')
+    return left, right, weight
+
+
+def _upsample(values, rays, gates, shape):
+    """ Bilinearly interpolates values calculated at the rays and gates
+    to the full shape. """
+    left, right, weight = _bracket(gates, shape[1])
+    values = values[:, left] * (1.0 - weight) + values[:, right] * weight
+    left, right, weight = _bracket(rays, shape[0])
+    weight = weight[:, np.newaxis]
+    return values[left] * (1.0 - weight) + values[right] * weight
+
+
+def _cbb_error(pbb, cbb, rays, gates, shape):
+    """ Returns the estimated CBB error at each gate of the full shape,
+    the CBB spread around the gate plus the largest PBB spread up to the
+    gate along the ray. """
+    missed = np.fmax.accumulate(
+        _spread(np.ma.filled(pbb, np.nan), rays, gates, shape), axis=1)
+    missed[np.isnan(missed)] = 0.0
+    return np.minimum(_spread(cbb, rays, gates, shape) + missed, 1.0)
+
+
+def _spread(values, rays, gates, shape):
+    """ Returns the difference between the largest and smallest of the
+    calculated values surrounding each gate of the full shape. """
+    left, right, _ = _bracket(gates, shape[1])
+    upper = np.fmax(values[:, left], values[:, right])
+    lower = np.fmin(values[:, left], values[:, right])
+    left, right, _ = _bracket(rays, shape[0])
+    upper = np.fmax(upper[left], upper[right])
+    lower = np.fmin(lower[left], lower[right])
+    return upper - lower
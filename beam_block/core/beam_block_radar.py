@@ -24,9 +24,15 @@ wradlib_beamblock.ipynb
 import numpy as np
 import wradlib as wrl
 
+from .beam_block_kernel import fused_beam_block_frac
+from .dem_pyramid import load_dem_pyramid, pyramid_gate_levels
+from .dem_tiles import is_dem_tiles, read_dem_tiles
+from .georef import polar_to_raster_xy
+from .sparse_blockage import _encode_sparse_flags
+
 
 def beam_block(radar, tif_file,
-               beam_width=1.0):
+               beam_width=1.0, dem_pyramid=False):
     """
     Beam Block Radar Calculation
 
@@ -36,13 +42,22 @@ def beam_block(radar, tif_file,
         Radar object used.
     tif_name : string
         Name of geotiff file to use for the
-        calculation
+        calculation. This can also be a directory of
+        geotiff tiles or a json manifest of tiles, in
+        which case only the tiles within the radar's
+        range are read.
 
     Other Parameters
     ----------------
     beam_width : float
         Radar's beam width for calculation.
         Default value is 1.0.
+    dem_pyramid : bool
+        True to interpolate the terrain at each gate from the coarsest
+        level of a cached DEM pyramid that still resolves the beam
+        footprint at the gate's range. This is faster for long ranges
+        but is an approximation. Default is False, which uses the full
+        resolution raster for every gate.
 
     Returns
     -------
@@ -76,15 +91,25 @@ def beam_block(radar, tif_file,
     # Emptying the radar fields.
     radar.fields.clear()
 
-    # Opening the tif file and getting the values ready to be
-    # converted into polar values.
-    rasterfile = tif_file
-    data_raster = wrl.io.open_raster(rasterfile)
-    rastervalues, rastercoords, proj = wrl.georef.extract_raster_dataset(
-        data_raster, nodata=None)
     sitecoords = (np.float(radar.longitude['data']),
                   np.float(radar.latitude['data']),
                   np.float(radar.altitude['data']))
+    max_range = np.max(radar.range['data'])
+
+    # Opening the tif file and getting the values ready to be
+    # converted into polar values.
+    if dem_pyramid:
+        pyramid, proj = load_dem_pyramid(
+            tif_file, sitecoords=sitecoords, max_range=max_range)
+        rastervalues, rastercoords = pyramid[0]
+        gate_levels = pyramid_gate_levels(
+            radar.range['data'], beam_width, pyramid, proj=proj,
+            sitecoords=sitecoords)
+    else:
+        rastervalues, rastercoords, proj = _read_raster(
+            tif_file, sitecoords, max_range)
+        pyramid = None
+        gate_levels = None
 
     pbb_arrays = []
     cbb_arrays = []
@@ -97,37 +122,72 @@ def beam_block(radar, tif_file,
 
         elevs = radar.elevation['data'][index_start:index_end]
         azimuths = radar.azimuth['data'][index_start:index_end]
-        rg, azg = np.meshgrid(_range, azimuths)
-        rg, eleg = np.meshgrid(_range, elevs)
-        lon, lat, alt = wrl.georef.polar2lonlatalt_n(
-            rg, azg, eleg, sitecoords)
-
-        x_pol, y_pol = wrl.georef.reproject(
-            lon, lat, projection_target=proj)
-        polcoords = np.dstack((x_pol, y_pol))
-        rlimits = (x_pol.min(), y_pol.min(), x_pol.max(), y_pol.max())
-        ind = wrl.util.find_bbox_indices(rastercoords, rlimits)
-        rastercoords = rastercoords[0:ind[3], ind[0]:ind[2], ...]
-        rastervalues = rastervalues[0:ind[3], ind[0]:ind[2]]
-
-        # Map rastervalues to polar grid points.
-        polarvalues = wrl.ipol.cart2irregular_spline(
-            rastercoords, rastervalues, polcoords)
-
-    # Calculate partial beam blockage using wradlib.
-    pbb = wrl.qual.beam_block_frac(polarvalues, alt, beamradius)
-    pbb = np.ma.masked_invalid(pbb)
-    pbb_arrays.append(pbb)
-
-    # Calculate cumulative beam blockage using wradlib.
-    cbb = wrl.qual.cum_beam_block_frac(pbb)
-    cbb_arrays.append(cbb)
-
+        pbb, cbb = _sweep_beam_block(
+            _range, azimuths, elevs, sitecoords, rastervalues,
+            rastercoords, proj, beamradius, pyramid=pyramid,
+            gate_levels=gate_levels)
+        pbb_arrays.append(pbb)
+        cbb_arrays.append(cbb)
+
+    # Stacks all sweeps blockage data.
     pbb_all = np.ma.concatenate(pbb_arrays)
     cbb_all = np.ma.concatenate(cbb_arrays)
     return pbb_all, cbb_all
 
 
+def _read_raster(tif_file, sitecoords=None, max_range=None):
+    """ Opens the tif file and returns the raster values, raster
+    coordinates and raster projection. For tiled DEMs only the tiles
+    within max_range of the site are read. """
+    if is_dem_tiles(tif_file):
+        return read_dem_tiles(tif_file, sitecoords, max_range)
+    data_raster = wrl.io.open_raster(tif_file)
+    return wrl.georef.extract_raster_dataset(data_raster, nodata=None)
+
+
+def _sweep_beam_block(_range, azimuths, elevs, sitecoords, rastervalues,
+                      rastercoords, proj, beamradius, pyramid=None,
+                      gate_levels=None):
+    """ Calculates the PBB and CBB arrays for the rays of a single sweep,
+    or any other set of rays sharing the same range gates. When a DEM
+    pyramid is given, each gate is interpolated from its pyramid level
+    in gate_levels instead of the full resolution raster. """
+    x_pol, y_pol, alt = polar_to_raster_xy(
+        _range, azimuths, elevs, sitecoords, proj)
+    if pyramid is None:
+        polarvalues = _interpolate_raster(
+            rastervalues, rastercoords, x_pol, y_pol)
+    else:
+        # Each level only interpolates its own range gates, from the
+        # part of the level's raster that covers them.
+        polarvalues = np.empty(x_pol.shape, dtype='float64')
+        for level, (values, coords) in enumerate(pyramid):
+            gates = gate_levels == level
+            if gates.any():
+                polarvalues[:, gates] = _interpolate_raster(
+                    values, coords, x_pol[:, gates], y_pol[:, gates])
+
+    # Calculate partial and cumulative beam blockage in a single pass,
+    # reusing the terrain and beam height arrays for the output.
+    pbb_out = polarvalues if polarvalues.dtype == np.float64 else None
+    cbb_out = alt if alt.dtype == np.float64 else None
+    pbb, cbb = fused_beam_block_frac(
+        polarvalues, alt, beamradius, pbb=pbb_out, cbb=cbb_out)
+    return pbb, cbb
+
+
+def _interpolate_raster(rastervalues, rastercoords, x_pol, y_pol):
+    """ Maps the raster values to the polar grid points, using only the
+    part of the raster within the bounding box of the points. """
+    polcoords = np.dstack((x_pol, y_pol))
+    rlimits = (x_pol.min(), y_pol.min(), x_pol.max(), y_pol.max())
+    ind = wrl.util.find_bbox_indices(rastercoords, rlimits)
+    rastercoords = rastercoords[0:ind[3], ind[0]:ind[2], ...]
+    rastervalues = rastervalues[0:ind[3], ind[0]:ind[2]]
+    return wrl.ipol.cart2irregular_spline(
+        rastercoords, rastervalues, polcoords)
+
+
 def beam_block_flags(pbb_all, cbb_all, no_block_thresh=0.01,
                      complete_block_thresh=0.95):
     """
@@ -136,12 +196,12 @@ def beam_block_flags(pbb_all, cbb_all, no_block_thresh=0.01,
 
     Parameters
     ----------
-    pbb_all : array
+    pbb_all : array or dict
         Array of partial beam blockage values created from the beam_block
-        function.
-    cbb_all : array
+        function, or the same values encoded with encode_blockage.
+    cbb_all : array or dict
         Array of cumulative beam blockage values created from the beam_block
-        function.
+        function, or the same values encoded with encode_blockage.
 
     Other Parameters
     ----------------
@@ -155,14 +215,16 @@ def beam_block_flags(pbb_all, cbb_all, no_block_thresh=0.01,
 
     Returns
     -------
-    pbb_flags : array
+    pbb_flags : array or dict
         Array of integer values depicting no, partial, and complete beam
         blockage based on the partial beam blockage data. This array can then
-        be used to create a partial beam block flags field.
-    cbb_flags : array
+        be used to create a partial beam block flags field. Encoded when
+        pbb_all is encoded.
+    cbb_flags : array or dict
         Array of integer values depicting no, partial, and complete beam
         blockage based on the cumulative beam blockage data. This array can
-        then be used to create a cumulative beam block flags field.
+        then be used to create a cumulative beam block flags field. Encoded
+        when cbb_all is encoded.
 
     Note
     ----
@@ -170,7 +232,15 @@ def beam_block_flags(pbb_all, cbb_all, no_block_thresh=0.01,
     the partial blockage flag value of 1, by having anything between the
     no_block_thresh and complete_block_thresh = 1.
 
+    Flags of encoded fields are calculated from the run values only,
+    without decoding the fields.
+
     """
+    if isinstance(pbb_all, dict):
+        return _encode_sparse_flags(
+            pbb_all, cbb_all, lambda pbb, cbb: beam_block_flags(
+                pbb, cbb, no_block_thresh, complete_block_thresh))
+
     pbb_flags = np.empty_like(pbb_all)
     pbb_flags[pbb_all > complete_block_thresh] = 2
     pbb_flags[
@@ -0,0 +1,201 @@
+"""
+beam_block.core.dem_pyramid
+===========================
+
+Multi-resolution DEM pyramid. Gate footprints near the radar are small,
+but far from the radar they are much larger than the DEM pixels, so
+interpolating every gate from the full resolution raster wastes time and
+memory. The pyramid holds the raster at successively halved resolutions
+and each gate is interpolated from the coarsest level that still
+resolves the beam footprint at its range.
+
+.. autosummary::
+    :toctreeL generated/
+    :template: dev_template.rst
+
+    build_dem_pyramid
+    load_dem_pyramid
+    pyramid_gate_levels
+
+"""
+
+import collections
+import os
+import threading
+
+import numpy as np
+
+# Pyramids of the most recently used DEMs, oldest first.
+_PYRAMID_CACHE = collections.OrderedDict()
+_PYRAMID_CACHE_SIZE = 4
+_PYRAMID_CACHE_LOCK = threading.Lock()
+
+
+def build_dem_pyramid(rastervalues, rastercoords, levels=6,
+                      min_size=16):
+    """
+    Build a DEM pyramid from raster values and coordinates.
+
+    Parameters
+    ----------
+    rastervalues : array
+        Array of raster values with shape (ny, nx).
+    rastercoords : array
+        Array of raster pixel edge coordinates with shape
+        (ny + 1, nx + 1, 2), as read from a geotiff, or of pixel center
+        coordinates with shape (ny, nx, 2).
+
+    Other Parameters
+    ----------------
+    levels : int
+        Largest number of levels, including the full resolution level.
+        Default value is 6.
+    min_size : int
+        Levels are not made smaller than this number of pixels along
+        either axis. Default value is 16.
+
+    Returns
+    -------
+    pyramid : list
+        List of (rastervalues, rastercoords) tuples starting at the full
+        resolution raster, with each level averaging 2 by 2 pixel blocks
+        of the level before. The coordinates of every level have the
+        same layout, edges or centers, as rastercoords.
+
+    """
+    pyramid = [(rastervalues, rastercoords)]
+    for _ in range(levels - 1):
+        values, coords = pyramid[-1]
+        ny = values.shape[0] // 2
+        nx = values.shape[1] // 2
+        if ny < min_size or nx < min_size:
+            break
+        edges = coords.shape[:2] != values.shape
+        values = values[:ny * 2, :nx * 2].reshape(
+            ny, 2, nx, 2).mean(axis=(1, 3))
+        if edges:
+            # Every other edge bounds the 2 by 2 blocks.
+            coords = coords[:ny * 2 + 1:2, :nx * 2 + 1:2]
+        else:
+            coords = coords[:ny * 2, :nx * 2].reshape(
+                ny, 2, nx, 2, 2).mean(axis=(1, 3))
+        pyramid.append((values, coords))
+    return pyramid
+
+
+def load_dem_pyramid(tif_file, levels=6, sitecoords=None, max_range=None):
+    """
+    Load the DEM pyramid of a tif file, building it on first use.
+
+    Parameters
+    ----------
+    tif_file : string
+        Name of geotiff file to use for the calculation.
+
+    Other Parameters
+    ----------------
+    levels : int
+        Largest number of levels, including the full resolution level.
+        Default value is 6.
+    sitecoords : tuple
+        Longitude, latitude and altitude of the radar, needed when
+        tif_file is a directory or manifest of DEM tiles.
+    max_range : float
+        Largest gate range of the radar in meters, needed when tif_file
+        is a directory or manifest of DEM tiles.
+
+    Returns
+    -------
+    pyramid : list
+        List of (rastervalues, rastercoords) tuples from
+        build_dem_pyramid.
+    proj : osr.SpatialReference
+        Projection of the raster.
+
+    Note
+    ----
+    The pyramids of the last few DEMs used are cached and rebuilt when
+    the tif file is modified. For a single geotiff the pyramid is shared
+    by all sites, while DEM tiles are cached per site and max_range as
+    only the tiles around the site are read.
+
+    """
+    from .beam_block_radar import _read_raster
+    from .dem_tiles import is_dem_tiles
+
+    key = (os.path.abspath(tif_file), os.path.getmtime(tif_file), levels)
+    if is_dem_tiles(tif_file):
+        key += (sitecoords, max_range)
+    with _PYRAMID_CACHE_LOCK:
+        if key in _PYRAMID_CACHE:
+            _PYRAMID_CACHE.move_to_end(key)
+            return _PYRAMID_CACHE[key]
+
+    rastervalues, rastercoords, proj = _read_raster(
+        tif_file, sitecoords, max_range)
+    pyramid = (build_dem_pyramid(rastervalues, rastercoords, levels), proj)
+    with _PYRAMID_CACHE_LOCK:
+        _PYRAMID_CACHE[key] = pyramid
+        while len(_PYRAMID_CACHE) > _PYRAMID_CACHE_SIZE:
+            _PYRAMID_CACHE.popitem(last=False)
+    return pyramid
+
+
+def pyramid_gate_levels(_range, beam_width, pyramid, oversample=2.0,
+                        proj=None, sitecoords=None):
+    """
+    Choose the pyramid level to interpolate each range gate from.
+
+    Parameters
+    ----------
+    _range : array
+        Array of gate ranges in meters.
+    beam_width : float
+        Radar's beam width in degrees.
+    pyramid : list
+        List of (rastervalues, rastercoords) tuples from
+        build_dem_pyramid.
+
+    Other Parameters
+    ----------------
+    oversample : float
+        Number of pixels that must fit across the beam footprint.
+        Default value is 2.0.
+    proj : osr.SpatialReference
+        Projection of the raster. When it is geographic, the pixel sizes
+        in degrees are converted to meters at the latitude of
+        sitecoords. Default is None, which takes the pixel sizes to be
+        in meters.
+    sitecoords : tuple
+        Longitude, latitude and altitude of the radar, needed when proj
+        is geographic.
+
+    Returns
+    -------
+    gate_levels : array
+        Array of pyramid level indices for each gate. The level is the
+        coarsest one whose pixel size is at most the beam footprint
+        width divided by oversample.
+
+    """
+    from .georef import _site_radius
+
+    # Meters per unit of the raster coordinates along x and y.
+    if proj is not None and proj.IsGeographic():
+        if sitecoords is None:
+            raise ValueError(
+                'sitecoords are needed for a geographic raster.')
+        meters = np.deg2rad(1.0) * _site_radius(sitecoords)
+        x_meters = meters * np.cos(np.deg2rad(sitecoords[1]))
+        y_meters = meters
+    else:
+        x_meters = y_meters = 1.0
+
+    footprint = np.asarray(_range) * np.deg2rad(beam_width)
+    gate_levels = np.zeros(len(footprint), dtype=int)
+    for level, (_, coords) in enumerate(pyramid):
+        pixel_size = max(
+            abs(coords[0, 1, 0] - coords[0, 0, 0]) * x_meters,
+            abs(coords[1, 0, 1] - coords[0, 0, 1]) * y_meters)
+        gate_levels[footprint >= pixel_size * oversample] = level
+    return gate_levels
@@ -0,0 +1,288 @@
+"""
+beam_block.core.dem_tiles
+=========================
+
+Tile index over DEMs that come as many GeoTIFF tiles. Instead of merging
+the tiles into one large mosaic beforehand, a directory of tiles or a
+JSON manifest listing them is indexed by tile extent, and only the tiles
+intersecting the radar's range footprint are read and stitched together.
+Decoded tiles are kept in a least recently used cache, bounded by the
+size of the tile values, so neighbouring radar sites reuse them.
+
+A manifest is a JSON file of the form::
+
+    {"tiles": [{"file": "n39w029.tif",
+                "bounds": [-29.0, 39.0, -28.0, 40.0]}, ...]}
+
+where the file names are relative to the manifest and the bounds, given
+as xmin, ymin, xmax, ymax in the tile projection, are optional.
+
+.. autosummary::
+    :toctreeL generated/
+    :template: dev_template.rst
+
+    build_tile_index
+    write_tile_manifest
+    load_dem_mosaic
+    read_dem_tiles
+
+"""
+
+import collections
+import glob
+import json
+import os
+import threading
+
+import numpy as np
+from osgeo import gdal, osr
+
+from .georef import polar_to_raster_xy
+
+_INDEX_CACHE = {}
+
+# Decoded tiles, least recently used first, and the largest number of
+# bytes of tile values they may hold.
+_TILE_CACHE = collections.OrderedDict()
+_TILE_CACHE_BYTES = 512 * 1024 ** 2
+_TILE_CACHE_LOCK = threading.Lock()
+
+
+def build_tile_index(source):
+    """
+    Build a spatial index over the tiles of a DEM mosaic.
+
+    Parameters
+    ----------
+    source : string
+        Directory of GeoTIFF tiles or JSON manifest file listing them.
+
+    Returns
+    -------
+    index : dict
+        Dictionary with the tile file names, an array of tile bounds
+        (xmin, ymin, xmax, ymax) with one row per tile, the tile
+        projection as WKT and the pixel size.
+
+    Note
+    ----
+    All tiles must share the same projection and pixel size and lie on
+    the same pixel grid, as is the case for national DEM products.
+
+    """
+    if os.path.isdir(source):
+        files = sorted(glob.glob(os.path.join(source, '*.tif'))
+                       + glob.glob(os.path.join(source, '*.tiff')))
+        tiles = [{'file': tile_file} for tile_file in files]
+    else:
+        with open(source) as manifest:
+            tiles = json.load(manifest)['tiles']
+        base = os.path.dirname(os.path.abspath(source))
+        for tile in tiles:
+            tile['file'] = os.path.join(base, tile['file'])
+    if not tiles:
+        raise ValueError('No DEM tiles found in %s.' % source)
+
+    # Only the headers are read here, the first tile also gives the
+    # projection and pixel size of the mosaic.
+    bounds = []
+    dataset = gdal.Open(tiles[0]['file'])
+    proj = dataset.GetProjection()
+    geotransform = dataset.GetGeoTransform()
+    for tile in tiles:
+        if 'bounds' not in tile:
+            tile['bounds'] = _tile_bounds(gdal.Open(tile['file']))
+        bounds.append(tile['bounds'])
+    return {'files': [tile['file'] for tile in tiles],
+            'bounds': np.array(bounds, dtype='float64'),
+            'proj': proj,
+            'pixel_size': (geotransform[1], geotransform[5])}
+
+
+def write_tile_manifest(index, filename):
+    """
+    Write a tile index to a JSON manifest, so later runs do not need to
+    open every tile to find its extent.
+
+    Parameters
+    ----------
+    index : dict
+        Tile index created by build_tile_index.
+    filename : string
+        Name of the manifest file to write.
+
+    """
+    base = os.path.dirname(os.path.abspath(filename))
+    tiles = [{'file': os.path.relpath(tile_file, base),
+              'bounds': list(bounds)}
+             for tile_file, bounds in zip(index['files'],
+                                          index['bounds'].tolist())]
+    with open(filename, 'w') as manifest:
+        json.dump({'tiles': tiles}, manifest, indent=1)
+
+
+def load_dem_mosaic(index, bbox):
+    """
+    Read and stitch the tiles of a mosaic that intersect a bounding box.
+
+    Parameters
+    ----------
+    index : dict
+        Tile index created by build_tile_index.
+    bbox : tuple
+        Bounding box (xmin, ymin, xmax, ymax) in the tile projection.
+
+    Returns
+    -------
+    rastervalues : array
+        Array of stitched raster values in the data type of the tiles.
+        Nodata values are kept, the same as when a single geotiff is
+        read, and gaps not covered by any tile have the nodata value of
+        the tiles, or zero (sea level) when they have none.
+    rastercoords : array
+        Array of pixel edge coordinates with shape (ny + 1, nx + 1, 2),
+        in the same layout as wradlib's extract_raster_dataset.
+    proj : osr.SpatialReference
+        Projection of the tiles.
+
+    """
+    bounds = index['bounds']
+    intersects = ((bounds[:, 0] < bbox[2]) & (bounds[:, 2] > bbox[0])
+                  & (bounds[:, 1] < bbox[3]) & (bounds[:, 3] > bbox[1]))
+    tiles = np.flatnonzero(intersects)
+    if len(tiles) == 0:
+        raise ValueError('No DEM tiles intersect the box %s.' % (bbox, ))
+
+    dx, dy = index['pixel_size']
+    # Grid origin at the upper left corner of the intersecting tiles,
+    # with dy negative for north up tiles.
+    x0 = bounds[tiles, 0].min()
+    y0 = bounds[tiles, 3].max()
+    col_start = max(_pixel_floor((bbox[0] - x0) / dx), 0)
+    row_start = max(_pixel_floor((bbox[3] - y0) / dy), 0)
+    col_end = _pixel_ceil((min(bbox[2], bounds[tiles, 2].max()) - x0) / dx)
+    row_end = _pixel_ceil((max(bbox[1], bounds[tiles, 1].min()) - y0) / dy)
+
+    rastervalues = None
+    for tile in tiles:
+        values, geotransform, nodata = _read_tile(index['files'][tile])
+        if rastervalues is None:
+            rastervalues = np.full(
+                (row_end - row_start, col_end - col_start),
+                0 if nodata is None else nodata, dtype=values.dtype)
+        col = int(round((geotransform[0] - x0) / dx)) - col_start
+        row = int(round((geotransform[3] - y0) / dy)) - row_start
+        # Overlap of the tile with the output window.
+        out_rows = slice(max(row, 0), min(row + values.shape[0],
+                                          rastervalues.shape[0]))
+        out_cols = slice(max(col, 0), min(col + values.shape[1],
+                                          rastervalues.shape[1]))
+        if out_rows.start >= out_rows.stop or \
+                out_cols.start >= out_cols.stop:
+            continue
+        rastervalues[out_rows, out_cols] = values[
+            out_rows.start - row:out_rows.stop - row,
+            out_cols.start - col:out_cols.stop - col]
+
+    x = x0 + np.arange(col_start, col_end + 1) * dx
+    y = y0 + np.arange(row_start, row_end + 1) * dy
+    rastercoords = np.dstack(np.meshgrid(x, y))
+    proj = osr.SpatialReference()
+    proj.ImportFromWkt(index['proj'])
+    return rastervalues, rastercoords, proj
+
+
+def read_dem_tiles(source, sitecoords, max_range, margin=1000.0):
+    """
+    Read the part of a tiled DEM covering a radar's range footprint.
+
+    Parameters
+    ----------
+    source : string
+        Directory of GeoTIFF tiles or JSON manifest file listing them.
+        The tile index is built on first use and cached.
+    sitecoords : tuple
+        Longitude, latitude and altitude of the radar.
+    max_range : float
+        Largest gate range of the radar in meters.
+
+    Other Parameters
+    ----------------
+    margin : float
+        Distance in meters the footprint is widened by, so the terrain
+        interpolation has data around the outermost gates. Default value
+        is 1000.0.
+
+    Returns
+    -------
+    rastervalues, rastercoords, proj
+        Stitched raster values, pixel edge coordinates with shape
+        (ny + 1, nx + 1, 2) and projection, as returned by
+        load_dem_mosaic.
+
+    """
+    key = (os.path.abspath(source), os.path.getmtime(source))
+    if key not in _INDEX_CACHE:
+        _INDEX_CACHE[key] = build_tile_index(source)
+    index = _INDEX_CACHE[key]
+
+    proj = osr.SpatialReference()
+    proj.ImportFromWkt(index['proj'])
+    # The footprint is the circle of the largest range around the site,
+    # found at the lowest elevation.
+    azimuths = np.arange(0.0, 360.0, 1.0)
+    x_edge, y_edge, _ = polar_to_raster_xy(
+        np.array([0.0, max_range + margin]), azimuths,
+        np.zeros(len(azimuths)), sitecoords, proj)
+    bbox = (x_edge.min(), y_edge.min(), x_edge.max(), y_edge.max())
+    return load_dem_mosaic(index, bbox)
+
+
+def is_dem_tiles(tif_file):
+    """ Returns True when the tif file names a directory of tiles or a
+    JSON manifest of tiles instead of a single GeoTIFF. """
+    return os.path.isdir(tif_file) or tif_file.lower().endswith('.json')
+
+
+def _tile_bounds(dataset):
+    """ Returns the bounds (xmin, ymin, xmax, ymax) of a GDAL dataset. """
+    geotransform = dataset.GetGeoTransform()
+    x_edges = (geotransform[0],
+               geotransform[0] + geotransform[1] * dataset.RasterXSize)
+    y_edges = (geotransform[3],
+               geotransform[3] + geotransform[5] * dataset.RasterYSize)
+    return [min(x_edges), min(y_edges), max(x_edges), max(y_edges)]
+
+
+def _pixel_floor(pixels):
+    """ Rounds a pixel offset down, ignoring floating point error. """
+    return int(np.floor(round(pixels, 6)))
+
+
+def _pixel_ceil(pixels):
+    """ Rounds a pixel offset up, ignoring floating point error. """
+    return int(np.ceil(round(pixels, 6)))
+
+
+def _read_tile(tile_file):
+    """ Decodes a tile, returning its values in their own data type, its
+    geotransform and nodata value. Recently used tiles are kept in memory
+    up to _TILE_CACHE_BYTES. """
+    with _TILE_CACHE_LOCK:
+        if tile_file in _TILE_CACHE:
+            _TILE_CACHE.move_to_end(tile_file)
+            return _TILE_CACHE[tile_file]
+
+    dataset = gdal.Open(tile_file)
+    band = dataset.GetRasterBand(1)
+    values = band.ReadAsArray()
+    values.setflags(write=False)
+    tile = (values, dataset.GetGeoTransform(), band.GetNoDataValue())
+
+    with _TILE_CACHE_LOCK:
+        _TILE_CACHE[tile_file] = tile
+        while (len(_TILE_CACHE) > 1 and sum(
+                cached[0].nbytes for cached in _TILE_CACHE.values())
+               > _TILE_CACHE_BYTES):
+            _TILE_CACHE.popitem(last=False)
+    return tile
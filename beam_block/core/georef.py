@@ -0,0 +1,235 @@
+"""
+beam_block.core.georef
+======================
+
+Georeferencing of radar gates directly into the raster projection.
+Gives the same coordinates as wradlib's polar2lonlatalt_n followed by
+reproject, but the beam heights and arc distances are only calculated
+once per elevation angle and range vector, and the gates are transformed
+from the azimuthal equidistant projection around the site straight into
+the raster projection, with one coordinate transformation created per
+site and projection instead of two on every call. The transformations
+are cached per thread, as OGR coordinate transformations must not be
+shared between threads.
+
+.. autosummary::
+    :toctreeL generated/
+    :template: dev_template.rst
+
+    polar_to_raster_xy
+
+"""
+
+import functools
+import threading
+
+import numpy as np
+from osgeo import osr
+
+# Semi-major and semi-minor axes of the WGS84 ellipsoid.
+_RADIUS_E = 6378137.0
+_RADIUS_P = 6356752.314245179
+
+_THREAD_CACHES = threading.local()
+
+
+def polar_to_raster_xy(_range, azimuths, elevs, sitecoords, proj,
+                       ke=4. / 3., ellipsoid=False):
+    """
+    Polar Gates to Raster Coordinates
+
+    Parameters
+    ----------
+    _range : array
+        Array of gate ranges in meters.
+    azimuths : array
+        Array of ray azimuths in degrees.
+    elevs : array
+        Array of ray elevation angles in degrees, same length as
+        azimuths.
+    sitecoords : tuple
+        Longitude, latitude and altitude of the radar.
+    proj : osr.SpatialReference
+        Projection of the raster.
+
+    Other Parameters
+    ----------------
+    ke : float
+        Adjustment factor for the effective earth radius. Default
+        value is 4/3.
+    ellipsoid : bool
+        True to use an azimuthal equidistant projection on the WGS84
+        ellipsoid, as newer wradlib releases do. Default is False, which
+        uses the projection of polar2lonlatalt_n, on a sphere of the
+        local earth radius with its longitudes and latitudes taken as
+        WGS84, and matches the sample beam block data.
+
+    Returns
+    -------
+    x_pol, y_pol : array
+        Arrays of gate coordinates in the raster projection, with shape
+        (rays, gates). When proj is None these are WGS84 longitudes and
+        latitudes.
+    alt : array
+        Array of beam heights above sea level at each gate, with shape
+        (rays, gates).
+
+    """
+    _range = np.ascontiguousarray(_range, dtype='float64')
+    range_key = _range.tobytes()
+    sitecoords = tuple(float(coord) for coord in sitecoords)
+
+    # Beam height and arc distance only depend on the elevation, so they
+    # are calculated once for each distinct elevation angle.
+    unique_elevs, elev_index = np.unique(
+        np.asarray(elevs, dtype='float64'), return_inverse=True)
+    terms = [_beam_terms(elev, sitecoords, range_key, ke)
+             for elev in unique_elevs]
+    alt = np.stack([term[0] for term in terms])[elev_index]
+    arc = np.stack([term[1] for term in terms])[elev_index] * _site_radius(
+        sitecoords)
+
+    # Gate positions in the azimuthal equidistant projection around the
+    # site, from the arc distances and per azimuth direction terms, are
+    # transformed into the raster projection in a single step.
+    az = np.radians(np.asarray(azimuths, dtype='float64'))[:, np.newaxis]
+    x_aeqd = arc * np.sin(az)
+    y_aeqd = arc * np.cos(az)
+    transform = _aeqd_transform(sitecoords, proj, ellipsoid)
+    points = np.column_stack((x_aeqd.ravel(), y_aeqd.ravel()))
+    trans = np.array(transform.TransformPoints(points))
+    x_pol = trans[:, 0].reshape(x_aeqd.shape)
+    y_pol = trans[:, 1].reshape(x_aeqd.shape)
+    return x_pol, y_pol, alt
+
+
+@functools.lru_cache(maxsize=256)
+def _beam_terms(elev, sitecoords, range_key, ke):
+    """ Returns the beam height above sea level and the arc distance in
+    radians at each gate for one elevation angle, using the formulas of
+    Doviak and Zrnic on the local earth radius. """
+    _range = np.frombuffer(range_key, dtype='float64')
+    re = _site_radius(sitecoords)
+    height = np.sqrt(_range ** 2 + (ke * re) ** 2 + 2 * _range * ke * re
+                     * np.sin(np.radians(elev))) - ke * re
+    arc = ke * re * np.arcsin(
+        _range * np.cos(np.radians(elev)) / (ke * re + height))
+    alt = height + sitecoords[2]
+    alt.setflags(write=False)
+    angle = arc / re
+    angle.setflags(write=False)
+    return alt, angle
+
+
+def _lonlat_to_polar(lon, lat, sitecoords):
+    """ Returns the azimuth in degrees and the angular arc distance from
+    the site of longitudes and latitudes, the forward counterpart of the
+    spherical azimuthal equidistant inverse in polar_to_raster_xy. """
+    lat0 = np.radians(sitecoords[1])
+    lat = np.radians(lat)
+    dlon = np.radians(np.asarray(lon) - sitecoords[0])
+    angle = 2 * np.arcsin(np.sqrt(
+        np.sin((lat - lat0) / 2) ** 2
+        + np.cos(lat0) * np.cos(lat) * np.sin(dlon / 2) ** 2))
+    azimuth = np.degrees(np.arctan2(
+        np.sin(dlon) * np.cos(lat),
+        np.cos(lat0) * np.sin(lat)
+        - np.sin(lat0) * np.cos(lat) * np.cos(dlon))) % 360.0
+    return azimuth, angle
+
+
+def _site_radius(sitecoords):
+    """ Returns the distance of the site from the earth's center, using
+    the local radius of the WGS84 ellipsoid at the site latitude. """
+    lat = np.radians(sitecoords[1])
+    earth_radius = np.sqrt(
+        (_RADIUS_E ** 4 * np.cos(lat) ** 2
+         + _RADIUS_P ** 4 * np.sin(lat) ** 2)
+        / (_RADIUS_E ** 2 * np.cos(lat) ** 2
+           + _RADIUS_P ** 2 * np.sin(lat) ** 2))
+    return earth_radius + sitecoords[2]
+
+
+def _thread_cache(name):
+    """ Returns the named transformation cache of the current thread. """
+    if not hasattr(_THREAD_CACHES, name):
+        setattr(_THREAD_CACHES, name, {})
+    return getattr(_THREAD_CACHES, name)
+
+
+def _aeqd_transform(sitecoords, proj, ellipsoid):
+    """ Returns the cached coordinate transformation from the azimuthal
+    equidistant projection around the site into the projection, or into
+    WGS84 longitude and latitude when proj is None. """
+    key = (sitecoords, None if proj is None else proj.ExportToWkt(),
+           ellipsoid)
+    cache = _thread_cache('aeqd')
+    if key not in cache:
+        if ellipsoid:
+            earth = '+ellps=WGS84 +datum=WGS84'
+        else:
+            # Without a datum, the spherical longitudes and latitudes are
+            # carried over to the raster datum unchanged, the same as
+            # reprojecting the output of polar2lonlatalt_n.
+            earth = '+a={0!r} +b={0!r}'.format(_site_radius(sitecoords))
+        aeqd = osr.SpatialReference()
+        aeqd.ImportFromProj4(
+            '+proj=aeqd +lon_0={0!r} +lat_0={1!r} {2} +units=m '
+            '+no_defs'.format(sitecoords[0], sitecoords[1], earth))
+        if proj is None:
+            proj = osr.SpatialReference()
+            proj.ImportFromEPSG(4326)
+        else:
+            proj = proj.Clone()
+        if hasattr(osr, 'OAMS_TRADITIONAL_GIS_ORDER'):
+            # Keep easting, northing and longitude, latitude ordering
+            # with GDAL 3.
+            aeqd.SetAxisMappingStrategy(osr.OAMS_TRADITIONAL_GIS_ORDER)
+            proj.SetAxisMappingStrategy(osr.OAMS_TRADITIONAL_GIS_ORDER)
+        cache[key] = osr.CoordinateTransformation(aeqd, proj)
+    return cache[key]
+
+
+def _lonlat_transform(proj):
+    """ Returns the cached coordinate transformation from WGS84 longitude
+    and latitude into the projection, or None when no transformation is
+    needed. """
+    if proj is None:
+        return None
+    key = proj.ExportToWkt()
+    cache = _thread_cache('lonlat')
+    if key not in cache:
+        wgs84 = osr.SpatialReference()
+        wgs84.ImportFromEPSG(4326)
+        if wgs84.IsSame(proj):
+            cache[key] = None
+        else:
+            if hasattr(osr, 'OAMS_TRADITIONAL_GIS_ORDER'):
+                # Keep longitude, latitude ordering with GDAL 3.
+                wgs84.SetAxisMappingStrategy(osr.OAMS_TRADITIONAL_GIS_ORDER)
+                proj = proj.Clone()
+                proj.SetAxisMappingStrategy(osr.OAMS_TRADITIONAL_GIS_ORDER)
+            cache[key] = osr.CoordinateTransformation(wgs84, proj)
+    return cache[key]
+
+
+def _raster_to_lonlat(x, y, proj):
+    """ Transforms coordinates in the raster projection into WGS84
+    longitude and latitude, caching the transformation per
+    projection. """
+    if _lonlat_transform(proj) is None:
+        return np.asarray(x, dtype='float64'), np.asarray(y, dtype='float64')
+    key = proj.ExportToWkt()
+    cache = _thread_cache('inverse')
+    if key not in cache:
+        wgs84 = osr.SpatialReference()
+        wgs84.ImportFromEPSG(4326)
+        if hasattr(osr, 'OAMS_TRADITIONAL_GIS_ORDER'):
+            wgs84.SetAxisMappingStrategy(osr.OAMS_TRADITIONAL_GIS_ORDER)
+            proj = proj.Clone()
+            proj.SetAxisMappingStrategy(osr.OAMS_TRADITIONAL_GIS_ORDER)
+        cache[key] = osr.CoordinateTransformation(proj, wgs84)
+    x, y = np.broadcast_arrays(x, y)
+    trans = np.array(cache[key].TransformPoints(
+        np.column_stack((x.ravel(), y.ravel()))))
+    return trans[:, 0].reshape(x.shape), trans[:, 1].reshape(x.shape)
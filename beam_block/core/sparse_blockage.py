@@ -0,0 +1,224 @@
+"""
+beam_block.core.sparse_blockage
+===============================
+
+Compact run-length representation of beam block fields. Blockage is
+sparse, most rays are not blocked at all and CBB only changes where a
+ray meets new terrain, so instead of dense (rays, gates) arrays a field
+is stored as runs of equal values along each ray. Gates outside the runs
+have the fill value, usually no blockage.
+
+An encoded field is a dictionary of one dimensional arrays:
+
+* shape : number of rays and gates of the dense field.
+* fill : value of the gates that are not in a run.
+* first_gate : first gate of each ray that is in a run, or the number
+  of gates when the whole ray has the fill value.
+* run_ray, run_start, run_length, run_value : ray, first gate, number
+  of gates and value of each run, ordered by ray and gate.
+* mask_ray, mask_start, mask_length : ray, first gate and number of
+  gates of each run of masked gates.
+
+.. autosummary::
+    :toctreeL generated/
+    :template: dev_template.rst
+
+    encode_blockage
+    decode_blockage
+    blockage_lookup
+
+"""
+
+import numpy as np
+
+
+def encode_blockage(data, fill=0.0, decimals=None):
+    """
+    Encode a beam block field as runs along each ray.
+
+    Parameters
+    ----------
+    data : array
+        Array of beam block fractions or flags with shape
+        (rays, gates). Masked and invalid gates are recorded in the
+        mask runs.
+
+    Other Parameters
+    ----------------
+    fill : float
+        Value of the gates that are not stored in runs. Default value
+        is 0.0, no blockage.
+    decimals : int
+        Number of decimals to round the values to before encoding,
+        which lengthens runs of nearly equal values. Default is None,
+        which keeps the values exactly.
+
+    Returns
+    -------
+    encoded : dict
+        Dictionary of the encoded field, see the module documentation.
+
+    """
+    data = np.ma.masked_invalid(data)
+    mask = np.ma.getmaskarray(data)
+    values = np.where(mask, fill, np.ma.getdata(data))
+    if decimals is not None:
+        values = np.round(values, decimals)
+
+    encoded = {'shape': values.shape, 'fill': fill}
+    (encoded['run_ray'], encoded['run_start'], encoded['run_length'],
+     encoded['run_value']) = _encode_runs(values, fill)
+    (encoded['mask_ray'], encoded['mask_start'], encoded['mask_length'],
+     _) = _encode_runs(mask, False)
+    encoded['first_gate'] = _first_gate(
+        encoded['run_ray'], encoded['run_start'], values.shape)
+    return encoded
+
+
+def decode_blockage(encoded):
+    """
+    Decode a beam block field encoded with encode_blockage.
+
+    Parameters
+    ----------
+    encoded : dict
+        Dictionary of the encoded field.
+
+    Returns
+    -------
+    data : MaskedArray
+        Array of the beam block field with shape (rays, gates).
+
+    """
+    shape = encoded['shape']
+    values = np.full(shape[0] * shape[1], encoded['fill'],
+                     dtype=np.result_type(encoded['run_value'],
+                                          encoded['fill']))
+    gates = _run_gates(encoded['run_ray'], encoded['run_start'],
+                       encoded['run_length'], shape)
+    values[gates] = np.repeat(encoded['run_value'], encoded['run_length'])
+
+    mask = np.zeros(shape[0] * shape[1], dtype=bool)
+    mask[_run_gates(encoded['mask_ray'], encoded['mask_start'],
+                    encoded['mask_length'], shape)] = True
+    return np.ma.MaskedArray(values.reshape(shape), mask=mask.reshape(shape))
+
+
+def blockage_lookup(encoded, rays, gates):
+    """
+    Look up values of an encoded beam block field without decoding it.
+
+    Parameters
+    ----------
+    encoded : dict
+        Dictionary of the encoded field.
+    rays : array
+        Array of ray indices to look up.
+    gates : array
+        Array of gate indices to look up, broadcastable against rays.
+
+    Returns
+    -------
+    values : MaskedArray
+        Array of the field values at the rays and gates.
+
+    """
+    rays, gates = np.broadcast_arrays(np.asarray(rays), np.asarray(gates))
+    values = np.full(rays.shape, encoded['fill'],
+                     dtype=np.result_type(encoded['run_value'],
+                                          encoded['fill']))
+    index, inside = _find_runs(
+        encoded['run_ray'], encoded['run_start'], encoded['run_length'],
+        encoded['shape'], rays, gates)
+    values[inside] = encoded['run_value'][index[inside]]
+    mask = _find_runs(
+        encoded['mask_ray'], encoded['mask_start'], encoded['mask_length'],
+        encoded['shape'], rays, gates)[1]
+    return np.ma.MaskedArray(values, mask=mask)
+
+
+def _encode_sparse_flags(pbb_all, cbb_all, flags_func):
+    """ Calculates flags of encoded PBB and CBB fields from their run
+    values only, returning encoded flag fields. """
+    flags = []
+    run_flags = flags_func(pbb_all['run_value'], cbb_all['run_value'])
+    fill_flags = flags_func(np.array([pbb_all['fill']], dtype=float),
+                            np.array([cbb_all['fill']], dtype=float))
+    for encoded, run_value, fill_value in zip(
+            (pbb_all, cbb_all), run_flags, fill_flags):
+        flag = dict(encoded)
+        flag['fill'] = fill_value[0]
+        # Neighbouring runs with the same flag are joined, and runs with
+        # the flag of the fill value are dropped.
+        (flag['run_ray'], flag['run_start'], flag['run_length'],
+         flag['run_value']) = _merge_runs(
+             encoded['run_ray'], encoded['run_start'],
+             encoded['run_length'], run_value, flag['fill'])
+        flag['first_gate'] = _first_gate(
+            flag['run_ray'], flag['run_start'], flag['shape'])
+        flags.append(flag)
+    return flags[0], flags[1]
+
+
+def _encode_runs(values, fill):
+    """ Returns the ray, start, length and value of the runs of equal
+    values along each ray that are not the fill value. """
+    nrays, ngates = values.shape
+    change = np.ones(values.shape, dtype=bool)
+    change[:, 1:] = values[:, 1:] != values[:, :-1]
+    ray, start = np.nonzero(change)
+    flat_start = ray * ngates + start
+    length = np.diff(np.append(flat_start, nrays * ngates))
+    value = values[ray, start]
+    keep = value != fill
+    return (ray[keep].astype('int32'), start[keep].astype('int32'),
+            length[keep].astype('int32'), value[keep])
+
+
+def _merge_runs(ray, start, length, value, fill):
+    """ Joins touching runs of equal value on the same ray and drops
+    runs with the fill value. """
+    keep = value != fill
+    ray, start, length, value = ray[keep], start[keep], length[keep], \
+        value[keep]
+    if len(ray) == 0:
+        return ray, start, length, value
+    joined = np.zeros(len(ray), dtype=bool)
+    joined[1:] = ((ray[1:] == ray[:-1])
+                  & (start[1:] == start[:-1] + length[:-1])
+                  & (value[1:] == value[:-1]))
+    first = np.flatnonzero(~joined)
+    end = np.append(first[1:], len(ray)) - 1
+    length = (start[end] + length[end] - start[first]).astype('int32')
+    return ray[first], start[first], length, value[first]
+
+
+def _first_gate(run_ray, run_start, shape):
+    """ Returns the first gate in a run for each ray, or the number of
+    gates for rays without runs. """
+    first_gate = np.full(shape[0], shape[1], dtype='int32')
+    rays, index = np.unique(run_ray, return_index=True)
+    first_gate[rays] = run_start[index]
+    return first_gate
+
+
+def _run_gates(ray, start, length, shape):
+    """ Returns the flat indices of all gates covered by the runs. """
+    offset = np.arange(length.sum()) - np.repeat(
+        np.cumsum(length) - length, length)
+    return np.repeat(ray.astype(np.int64) * shape[1] + start, length) + offset
+
+
+def _find_runs(ray, start, length, shape, rays, gates):
+    """ Returns the index of the run at or before each ray and gate and
+    whether the gate is inside that run. """
+    run_key = ray.astype(np.int64) * shape[1] + start
+    key = rays.astype(np.int64) * shape[1] + gates
+    index = np.searchsorted(run_key, key, side='right') - 1
+    inside = index >= 0
+    found = np.where(inside, index, 0)
+    if len(run_key):
+        inside &= key < run_key[found] + length[found]
+    else:
+        inside[...] = False
+    return found, inside
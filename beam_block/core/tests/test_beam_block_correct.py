@@ -0,0 +1,96 @@
+""" Unit Tests for Beam Block's core/beam_block_correct.py module. """
+
+import numpy as np
+import pyart
+from numpy.testing import assert_almost_equal, assert_raises
+
+import beam_block
+
+
+radar_bb = pyart.io.read(beam_block.testing.SAMPLE_RADAR_BLOCK_DATA_FILE)
+cbb_existing = radar_bb.fields['cumulative_beam_block']['data']
+cbb_flags_existing = radar_bb.fields['cumulative_beam_block_flags']['data']
+
+
+def test_beam_block_correction():
+    """ Unit test for the beam_block_correct.beam_block_correction
+    function. """
+    max_block = 0.5
+    correction = beam_block.core.beam_block_correction(
+        cbb_existing, cbb_flags_existing, max_block=max_block)
+    assert correction.shape == (360, 360)
+
+    not_blocked = (cbb_existing < 0.01) & ~np.ma.getmaskarray(correction)
+    assert_almost_equal(correction[not_blocked], 0.0, 1)
+    assert np.all(np.ma.getmaskarray(correction)[cbb_existing > max_block])
+    assert np.all(np.ma.getmaskarray(correction)[cbb_flags_existing == 2])
+    assert correction.max() <= 10.0 * np.log10(2.0) + 1e-6
+
+
+def test_correct_beam_block():
+    """ Unit test for the beam_block_correct.correct_beam_block
+    function. """
+    radar = pyart.io.read(beam_block.testing.SAMPLE_RADAR_NC_FILE)
+    refl = np.ma.MaskedArray(np.full((360, 360), 20.0, dtype='float32'))
+    radar.add_field('reflectivity', {'data': refl.copy()})
+    radar.add_field('velocity', {'data': np.ma.ones((360, 360))})
+
+    correction = beam_block.core.beam_block_correction(
+        cbb_existing, cbb_flags_existing)
+    beam_block.core.correct_beam_block(
+        radar, correction, refl_fields=['reflectivity'],
+        mask_fields=['velocity'])
+
+    refl_corrected = radar.fields['reflectivity']['data']
+    mask = np.ma.getmaskarray(correction)
+    assert np.all(np.ma.getmaskarray(refl_corrected)[mask])
+    assert np.all(np.ma.getmaskarray(radar.fields['velocity']['data'])[mask])
+    assert_almost_equal(refl_corrected[~mask],
+                        20.0 + correction[~mask], 4)
+
+
+def test_correct_beam_block_dbz():
+    """ Unit test for the beam_block_correct.correct_beam_block function
+    finding the reflectivity field of a CF/Radial file. """
+    radar = pyart.io.read(beam_block.testing.SAMPLE_RADAR_NC_FILE)
+    for field in list(radar.fields):
+        del radar.fields[field]
+    correction = beam_block.core.beam_block_correction(
+        cbb_existing, cbb_flags_existing)
+    assert_raises(ValueError, beam_block.core.correct_beam_block,
+                  radar, correction)
+
+    refl = np.ma.MaskedArray(np.full((360, 360), 20.0, dtype='float32'))
+    radar.add_field('DBZ', {'data': refl.copy()})
+    beam_block.core.correct_beam_block(radar, correction)
+    mask = np.ma.getmaskarray(correction)
+    refl_corrected = radar.fields['DBZ']['data']
+    assert np.all(np.ma.getmaskarray(refl_corrected)[mask])
+    assert_almost_equal(refl_corrected[~mask],
+                        20.0 + correction[~mask], 4)
+
+def test_correct_beam_block_ray_matching():
+    """ Unit test for the beam_block_correct.correct_beam_block
+    function with a radar whose sweep starts at another azimuth. """
+    radar = pyart.io.read(beam_block.testing.SAMPLE_RADAR_NC_FILE)
+    radar.azimuth['data'] = np.roll(radar.azimuth['data'], 90)
+    refl = np.ma.MaskedArray(np.full((360, 360), 20.0, dtype='float32'))
+    radar.add_field('reflectivity', {'data': refl.copy()})
+
+    correction = beam_block.core.beam_block_correction(
+        cbb_existing, cbb_flags_existing)
+    beam_block.core.correct_beam_block(
+        radar, correction, refl_fields=['reflectivity'],
+        block_radar=radar_bb)
+
+    expected = np.ma.MaskedArray(np.roll(correction, 90, axis=0))
+    refl_corrected = radar.fields['reflectivity']['data']
+    mask = np.ma.getmaskarray(expected)
+    assert np.all(np.ma.getmaskarray(refl_corrected)[mask])
+    assert_almost_equal(refl_corrected[~mask], 20.0 + expected[~mask], 4)
+
+    # Rays pointing away from every cached ray are not corrected.
+    radar.azimuth['data'] = radar.azimuth['data'] + 0.5
+    assert_raises(ValueError, beam_block.core.correct_beam_block,
+                  radar, correction, block_radar=radar_bb,
+                  max_angle_diff=0.25)
@@ -0,0 +1,47 @@
+""" Unit Tests for Beam Block's core/beam_block_kernel.py module. """
+
+import numpy as np
+import wradlib as wrl
+from numpy.testing import assert_almost_equal, assert_array_equal
+
+import beam_block
+from beam_block.core import beam_block_kernel
+
+
+_range = np.arange(0.0, 36000.0, 100.0)
+beamradius = wrl.util.half_power_radius(_range, 1.0)
+beamheight = np.tile(_range * 0.03, (50, 1))
+random = np.random.RandomState(0)
+terrainheight = beamheight + random.normal(
+    0, 1, beamheight.shape) * beamradius * 1.2
+terrainheight[3, 40:50] = np.nan
+
+
+def test_fused_beam_block_frac():
+    """ Unit test for the beam_block_kernel.fused_beam_block_frac
+    function. """
+    pbb_wrl = wrl.qual.beam_block_frac(terrainheight, beamheight, beamradius)
+    pbb_wrl = np.ma.masked_invalid(pbb_wrl)
+    cbb_wrl = wrl.qual.cum_beam_block_frac(pbb_wrl)
+
+    pbb, cbb = beam_block.core.fused_beam_block_frac(
+        terrainheight, beamheight, beamradius, use_numba=False)
+    assert_array_equal(pbb.mask, pbb_wrl.mask)
+    assert_almost_equal(pbb, pbb_wrl, 6)
+    assert_almost_equal(cbb, cbb_wrl, 6)
+
+    # Writing the output into the input arrays gives the same values.
+    terrain_copy = terrainheight.copy()
+    beam_copy = beamheight.copy()
+    pbb_inplace, cbb_inplace = beam_block.core.fused_beam_block_frac(
+        terrain_copy, beam_copy, beamradius, pbb=terrain_copy,
+        cbb=beam_copy, use_numba=False)
+    assert_almost_equal(pbb_inplace, pbb, 10)
+    assert_almost_equal(cbb_inplace, cbb, 10)
+
+    if beam_block_kernel._NUMBA_AVAILABLE:
+        pbb_numba, cbb_numba = beam_block.core.fused_beam_block_frac(
+            terrainheight, beamheight, beamradius, use_numba=True)
+        assert_array_equal(pbb_numba.mask, pbb.mask)
+        assert_almost_equal(pbb_numba, pbb, 10)
+        assert_almost_equal(cbb_numba, cbb, 10)
@@ -0,0 +1,37 @@
+""" Unit Tests for Beam Block's core/beam_block_lazy.py module. """
+
+import numpy as np
+import pyart
+from numpy.testing import assert_almost_equal
+
+import beam_block
+
+
+def test_lazy_beam_block():
+    """ Unit test for the beam_block_lazy.lazy_beam_block function. """
+    radar = pyart.io.read(beam_block.testing.SAMPLE_RADAR_NC_FILE)
+    tif_file = beam_block.testing.SAMPLE_TIF_FILE
+    beam_width = 1.0
+
+    radar_bb_data = pyart.io.read(
+        beam_block.testing.SAMPLE_RADAR_BLOCK_DATA_FILE)
+    pbb_existing = radar_bb_data.fields['partial_beam_block']['data']
+    cbb_existing = radar_bb_data.fields['cumulative_beam_block']['data']
+
+    dataset = beam_block.core.lazy_beam_block(
+        radar, tif_file, beam_width, rays_per_chunk=90)
+    assert dataset['partial_beam_block'].shape == (360, 360)
+    assert dataset['partial_beam_block'].chunks[0] == (90, 90, 90, 90)
+
+    # Selecting an azimuth sector only calculates the chunks covering it.
+    sector = dataset.isel(time=slice(0, 90)).compute()
+    pbb = np.ma.masked_invalid(sector['partial_beam_block'].values)
+    cbb = np.ma.masked_invalid(sector['cumulative_beam_block'].values)
+    assert_almost_equal(pbb, pbb_existing[0:90], 3)
+    assert_almost_equal(cbb, cbb_existing[0:90], 3)
+
+    dataset = dataset.compute()
+    pbb_all = np.ma.masked_invalid(dataset['partial_beam_block'].values)
+    cbb_all = np.ma.masked_invalid(dataset['cumulative_beam_block'].values)
+    assert_almost_equal(pbb_all, pbb_existing, 3)
+    assert_almost_equal(cbb_all, cbb_existing, 3)
@@ -0,0 +1,67 @@
+""" Unit Tests for Beam Block's core/beam_block_preview.py module. """
+
+import numpy as np
+import pyart
+from numpy.testing import assert_almost_equal
+
+import beam_block
+
+
+def test_preview_beam_block():
+    """ Unit test for the beam_block_preview.preview_beam_block
+    function. """
+    radar = pyart.io.read(beam_block.testing.SAMPLE_RADAR_NC_FILE)
+    tif_file = beam_block.testing.SAMPLE_TIF_FILE
+
+    radar_bb_data = pyart.io.read(
+        beam_block.testing.SAMPLE_RADAR_BLOCK_DATA_FILE)
+    pbb_existing = radar_bb_data.fields['partial_beam_block']['data']
+    cbb_existing = radar_bb_data.fields['cumulative_beam_block']['data']
+
+    pbb_all, cbb_all, cbb_error = beam_block.core.preview_beam_block(
+        radar, tif_file, 1.0, ray_step=4, gate_step=4)
+    assert pbb_all.shape == cbb_existing.shape
+    assert cbb_all.shape == cbb_existing.shape
+    assert cbb_error.shape == cbb_existing.shape
+    assert np.all(cbb_error >= 0)
+    # The calculated gates have the full resolution PBB, but their CBB
+    # can miss blockage between them.
+    assert_almost_equal(pbb_all[::4, ::4], pbb_existing[::4, ::4], 3)
+    assert np.all(cbb_all[::4, ::4] <= cbb_existing[::4, ::4] + 1e-3)
+    assert np.abs(cbb_all - cbb_existing).mean() < 0.1
+
+    # The error estimate carries blockage that can lie between the
+    # calculated gates down range, covering the CBB error on average.
+    assert np.all(cbb_error <= 1.0)
+    assert cbb_error[::4, ::4].max() > 0.0
+    assert cbb_error.mean() >= np.abs(cbb_all - cbb_existing).mean()
+
+    pbb_all, cbb_all, cbb_error = beam_block.core.preview_beam_block(
+        radar, tif_file, 1.0, shape=(90, 90))
+    assert cbb_all.shape == cbb_existing.shape
+
+
+def test_progressive_beam_block():
+    """ Unit test for the beam_block_preview.progressive_beam_block
+    function. """
+    radar = pyart.io.read(beam_block.testing.SAMPLE_RADAR_NC_FILE)
+    tif_file = beam_block.testing.SAMPLE_TIF_FILE
+
+    radar_bb_data = pyart.io.read(
+        beam_block.testing.SAMPLE_RADAR_BLOCK_DATA_FILE)
+    pbb_existing = radar_bb_data.fields['partial_beam_block']['data']
+    cbb_existing = radar_bb_data.fields['cumulative_beam_block']['data']
+
+    previews = list(beam_block.core.progressive_beam_block(
+        radar, tif_file, 1.0, steps=(8, 1)))
+    assert [step for step, _, _, _ in previews] == [8, 1]
+
+    # Steps reusing earlier gates match a preview calculated on its own.
+    preview = beam_block.core.preview_beam_block(
+        radar, tif_file, 1.0, ray_step=8, gate_step=8)
+    for progressive, single in zip(previews[0][1:], preview):
+        assert_almost_equal(progressive, single)
+    step, pbb_all, cbb_all, cbb_error = previews[-1]
+    assert_almost_equal(pbb_all, pbb_existing, 3)
+    assert_almost_equal(cbb_all, cbb_existing, 3)
+    assert np.all(cbb_error == 0)
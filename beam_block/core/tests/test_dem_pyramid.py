@@ -0,0 +1,94 @@
+""" Unit Tests for Beam Block's core/dem_pyramid.py module. """
+
+import numpy as np
+import pyart
+from numpy.testing import assert_almost_equal, assert_raises
+from osgeo import osr
+
+import beam_block
+from beam_block.core import dem_pyramid
+
+
+def test_build_dem_pyramid():
+    """ Unit test for the dem_pyramid.build_dem_pyramid function. """
+    x = np.arange(200) * 10.0
+    y = 5000.0 - np.arange(150) * 10.0
+    rastercoords = np.dstack(np.meshgrid(x, y))
+    rastervalues = np.random.RandomState(0).rand(150, 200)
+
+    pyramid = dem_pyramid.build_dem_pyramid(
+        rastervalues, rastercoords, levels=4)
+    assert len(pyramid) == 4
+    assert pyramid[1][0].shape == (75, 100)
+    assert pyramid[3][1].shape == (18, 25, 2)
+    assert_almost_equal(pyramid[1][0][0, 0], rastervalues[:2, :2].mean())
+    assert_almost_equal(pyramid[1][1][0, 0], [5.0, 4995.0])
+    assert_almost_equal(pyramid[2][1][0, 1, 0] - pyramid[2][1][0, 0, 0], 40.0)
+
+    # Edge coordinates, as read from a geotiff, keep bounding the
+    # averaged blocks.
+    x_edges = np.arange(201) * 10.0
+    y_edges = 5000.0 - np.arange(151) * 10.0
+    edges = np.dstack(np.meshgrid(x_edges, y_edges))
+    pyramid_edges = dem_pyramid.build_dem_pyramid(
+        rastervalues, edges, levels=4)
+    assert pyramid_edges[1][1].shape == (76, 101, 2)
+    assert pyramid_edges[2][1].shape == (38, 51, 2)
+    assert_almost_equal(pyramid_edges[1][1][0, 0], [0.0, 5000.0])
+    assert_almost_equal(pyramid_edges[1][1][1, 1], [20.0, 4980.0])
+    assert_almost_equal(pyramid_edges[2][1][1, 1], [40.0, 4960.0])
+    assert_almost_equal(pyramid_edges[1][0], pyramid[1][0])
+
+    _range = np.arange(0.0, 100000.0, 1000.0)
+    gate_levels = dem_pyramid.pyramid_gate_levels(_range, 1.0, pyramid)
+    assert gate_levels[0] == 0
+    assert gate_levels[-1] == 3
+    assert np.all(np.diff(gate_levels) >= 0)
+
+
+
+def test_pyramid_gate_levels_geographic():
+    """ Unit test for the dem_pyramid.pyramid_gate_levels function with
+    a raster in longitude and latitude. """
+    lon = -28.5 + np.arange(1025) * 0.0003
+    lat = 39.3 - np.arange(1025) * 0.0003
+    rastercoords = np.dstack(np.meshgrid(lon, lat))
+    rastervalues = np.zeros((1024, 1024))
+    pyramid = dem_pyramid.build_dem_pyramid(rastervalues, rastercoords)
+    proj = osr.SpatialReference()
+    proj.ImportFromEPSG(4326)
+    sitecoords = (-28.0, 39.0, 40.0)
+
+    # The 0.0003 degree pixels are about 33 m along latitude, so a 1
+    # degree beam needs the full resolution close to the radar, level 1
+    # at 10 km and level 4 at 100 km.
+    _range = np.array([100.0, 10000.0, 100000.0])
+    gate_levels = dem_pyramid.pyramid_gate_levels(
+        _range, 1.0, pyramid, proj=proj, sitecoords=sitecoords)
+    assert list(gate_levels) == [0, 1, 4]
+    assert_raises(ValueError, dem_pyramid.pyramid_gate_levels,
+                  _range, 1.0, pyramid, proj=proj)
+
+def test_beam_block_dem_pyramid():
+    """ Unit test for the beam_block function using a DEM pyramid. """
+    radar = pyart.io.read(beam_block.testing.SAMPLE_RADAR_NC_FILE)
+    tif_file = beam_block.testing.SAMPLE_TIF_FILE
+
+    pyramid, _ = dem_pyramid.load_dem_pyramid(tif_file)
+    assert dem_pyramid.load_dem_pyramid(tif_file)[0] is pyramid
+    # A single geotiff is read whole, so all sites share its pyramid.
+    assert dem_pyramid.load_dem_pyramid(
+        tif_file, sitecoords=(-28.0, 39.0, 40.0),
+        max_range=50000.0)[0] is pyramid
+    assert len(dem_pyramid._PYRAMID_CACHE) <= dem_pyramid._PYRAMID_CACHE_SIZE
+
+    radar_bb_data = pyart.io.read(
+        beam_block.testing.SAMPLE_RADAR_BLOCK_DATA_FILE)
+    pbb_existing = radar_bb_data.fields['partial_beam_block']['data']
+    cbb_existing = radar_bb_data.fields['cumulative_beam_block']['data']
+
+    pbb_all, cbb_all = beam_block.core.beam_block(
+        radar, tif_file, 1.0, dem_pyramid=True)
+    stats = beam_block.testing.blockage_error_stats(
+        pbb_all, cbb_all, pbb_existing, cbb_existing)
+    assert stats['cbb_mean_error'] < 0.05
@@ -0,0 +1,78 @@
+""" Unit Tests for Beam Block's core/dem_tiles.py module. """
+
+import os
+import shutil
+import tempfile
+
+import pyart
+from numpy.testing import assert_almost_equal
+from osgeo import gdal
+
+import beam_block
+from beam_block.core import dem_tiles
+from beam_block.core.beam_block_radar import _read_raster
+
+
+def _split_tif(tif_file, tile_dir, ntiles=2):
+    """ Splits a tif file into ntiles by ntiles tiles. """
+    dataset = gdal.Open(tif_file)
+    nx = dataset.RasterXSize
+    ny = dataset.RasterYSize
+    for i in range(ntiles):
+        for j in range(ntiles):
+            x0 = i * nx // ntiles
+            y0 = j * ny // ntiles
+            gdal.Translate(
+                os.path.join(tile_dir, 'tile_%d_%d.tif' % (i, j)), dataset,
+                srcWin=[x0, y0, (i + 1) * nx // ntiles - x0,
+                        (j + 1) * ny // ntiles - y0])
+
+
+def test_build_tile_index():
+    """ Unit test for the dem_tiles.build_tile_index function. """
+    tile_dir = tempfile.mkdtemp()
+    try:
+        _split_tif(beam_block.testing.SAMPLE_TIF_FILE, tile_dir)
+        index = dem_tiles.build_tile_index(tile_dir)
+        assert len(index['files']) == 4
+        assert index['bounds'].shape == (4, 4)
+
+        manifest = os.path.join(tile_dir, 'tiles.json')
+        dem_tiles.write_tile_manifest(index, manifest)
+        manifest_index = dem_tiles.build_tile_index(manifest)
+        assert manifest_index['files'] == index['files']
+        assert_almost_equal(manifest_index['bounds'], index['bounds'])
+
+        # The mosaic of all tiles is the original raster as read for a
+        # single geotiff, nodata values included.
+        dataset = gdal.Open(beam_block.testing.SAMPLE_TIF_FILE)
+        bbox = dem_tiles._tile_bounds(dataset)
+        rastervalues, rastercoords, _ = dem_tiles.load_dem_mosaic(
+            index, bbox)
+        values_tif, coords_tif, _ = _read_raster(
+            beam_block.testing.SAMPLE_TIF_FILE)
+        assert rastervalues.dtype == values_tif.dtype
+        assert_almost_equal(rastervalues, values_tif)
+        assert_almost_equal(rastercoords, coords_tif, 6)
+    finally:
+        shutil.rmtree(tile_dir)
+
+
+def test_beam_block_dem_tiles():
+    """ Unit test for the beam_block function using DEM tiles. """
+    radar = pyart.io.read(beam_block.testing.SAMPLE_RADAR_NC_FILE)
+    radar_bb_data = pyart.io.read(
+        beam_block.testing.SAMPLE_RADAR_BLOCK_DATA_FILE)
+    pbb_existing = radar_bb_data.fields['partial_beam_block']['data']
+    cbb_existing = radar_bb_data.fields['cumulative_beam_block']['data']
+
+    tile_dir = tempfile.mkdtemp()
+    try:
+        _split_tif(beam_block.testing.SAMPLE_TIF_FILE, tile_dir)
+        pbb_all, cbb_all = beam_block.core.beam_block(
+            radar, tile_dir, 1.0)
+    finally:
+        shutil.rmtree(tile_dir)
+
+    assert_almost_equal(pbb_all, pbb_existing, 3)
+    assert_almost_equal(cbb_all, cbb_existing, 3)
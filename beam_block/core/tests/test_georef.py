@@ -0,0 +1,89 @@
+""" Unit Tests for Beam Block's core/georef.py module. """
+
+from concurrent.futures import ThreadPoolExecutor
+
+import numpy as np
+import wradlib as wrl
+from numpy.testing import assert_almost_equal
+
+import beam_block
+from beam_block.core import georef
+
+
+def test_polar_to_raster_xy():
+    """ Unit test for the georef.polar_to_raster_xy function. """
+    data_raster = wrl.io.open_raster(beam_block.testing.SAMPLE_TIF_FILE)
+    proj = wrl.georef.extract_raster_dataset(data_raster, nodata=None)[2]
+    sitecoords = (-28.0272, 39.0916, 40.0)
+    _range = np.arange(0.0, 36000.0, 100.0)
+    azimuths = np.arange(0.0, 360.0, 1.0)
+    elevs = np.full(360, 2.0)
+    elevs[:90] = 0.5
+
+    rg, azg = np.meshgrid(_range, azimuths)
+    rg, eleg = np.meshgrid(_range, elevs)
+    lon, lat, alt_wrl = wrl.georef.polar2lonlatalt_n(
+        rg, azg, eleg, sitecoords)
+    x_wrl, y_wrl = wrl.georef.reproject(lon, lat, projection_target=proj)
+
+    x_pol, y_pol, alt = beam_block.core.polar_to_raster_xy(
+        _range, azimuths, elevs, sitecoords, proj)
+    assert_almost_equal(x_pol, x_wrl, 3)
+    assert_almost_equal(y_pol, y_wrl, 3)
+    assert_almost_equal(alt, alt_wrl, 3)
+
+    # Cached terms give the same coordinates on a second call.
+    x_again = beam_block.core.polar_to_raster_xy(
+        _range, azimuths, elevs, sitecoords, proj)[0]
+    assert_almost_equal(x_again, x_pol, 10)
+
+
+def test_polar_to_raster_xy_ellipsoid():
+    """ Unit test for the georef.polar_to_raster_xy function with an
+    azimuthal equidistant projection on the WGS84 ellipsoid. """
+    data_raster = wrl.io.open_raster(beam_block.testing.SAMPLE_TIF_FILE)
+    proj = wrl.georef.extract_raster_dataset(data_raster, nodata=None)[2]
+    sitecoords = (-28.0272, 39.0916, 40.0)
+    _range = np.arange(0.0, 36000.0, 100.0)
+    azimuths = np.arange(0.0, 360.0, 1.0)
+    elevs = np.full(360, 0.5)
+
+    x_pol, y_pol, alt = beam_block.core.polar_to_raster_xy(
+        _range, azimuths, elevs, sitecoords, proj, ellipsoid=True)
+
+    rg, azg = np.meshgrid(_range, azimuths)
+    re = wrl.georef.get_earth_radius(sitecoords[1]) + sitecoords[2]
+    arc = wrl.georef.arc_distance_n(rg, 0.5, re, 4. / 3.)
+    aeqd = wrl.georef.create_osr(
+        'aeqd', lon_0=sitecoords[0], lat_0=sitecoords[1])
+    x_wrl, y_wrl = wrl.georef.reproject(
+        arc * np.sin(np.radians(azg)), arc * np.cos(np.radians(azg)),
+        projection_source=aeqd, projection_target=proj)
+    assert_almost_equal(x_pol, x_wrl, 3)
+    assert_almost_equal(y_pol, y_wrl, 3)
+
+
+def test_polar_to_raster_xy_threads():
+    """ Unit test for the georef.polar_to_raster_xy function called from
+    several threads. """
+    data_raster = wrl.io.open_raster(beam_block.testing.SAMPLE_TIF_FILE)
+    proj = wrl.georef.extract_raster_dataset(data_raster, nodata=None)[2]
+    sitecoords = (-28.0272, 39.0916, 40.0)
+    _range = np.arange(0.0, 36000.0, 100.0)
+    azimuths = np.arange(0.0, 360.0, 1.0)
+    elevs = np.full(360, 0.5)
+
+    def transform():
+        x_pol, y_pol, _ = beam_block.core.polar_to_raster_xy(
+            _range, azimuths, elevs, sitecoords, proj)
+        return x_pol, y_pol, georef._aeqd_transform(sitecoords, proj, False)
+
+    x_ref, y_ref, transform_ref = transform()
+    with ThreadPoolExecutor(4) as executor:
+        futures = [executor.submit(transform) for _ in range(8)]
+        results = [future.result() for future in futures]
+    for x_pol, y_pol, thread_transform in results:
+        assert_almost_equal(x_pol, x_ref)
+        assert_almost_equal(y_pol, y_ref)
+        # Worker threads never share the main thread's transformation.
+        assert thread_transform is not transform_ref
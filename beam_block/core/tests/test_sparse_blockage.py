@@ -0,0 +1,58 @@
+""" Unit Tests for Beam Block's core/sparse_blockage.py module. """
+
+import numpy as np
+import pyart
+from numpy.testing import assert_almost_equal, assert_array_equal
+
+import beam_block
+
+
+radar_bb = pyart.io.read(beam_block.testing.SAMPLE_RADAR_BLOCK_DATA_FILE)
+pbb_existing = radar_bb.fields['partial_beam_block']['data']
+cbb_existing = radar_bb.fields['cumulative_beam_block']['data']
+
+
+def test_encode_decode_blockage():
+    """ Unit test for the sparse_blockage.encode_blockage and
+    sparse_blockage.decode_blockage functions. """
+    for data in (pbb_existing, cbb_existing):
+        encoded = beam_block.core.encode_blockage(data)
+        assert len(encoded['run_ray']) < data.size // 10
+        decoded = beam_block.core.decode_blockage(encoded)
+        assert_array_equal(np.ma.getmaskarray(decoded),
+                           np.ma.getmaskarray(data))
+        assert_almost_equal(decoded, data, 10)
+
+    encoded = beam_block.core.encode_blockage(cbb_existing)
+    blocked = np.argmax(cbb_existing > 0, axis=1)
+    blocked[~np.any(cbb_existing > 0, axis=1)] = cbb_existing.shape[1]
+    assert_array_equal(encoded['first_gate'], blocked)
+
+
+def test_blockage_lookup():
+    """ Unit test for the sparse_blockage.blockage_lookup function. """
+    encoded = beam_block.core.encode_blockage(pbb_existing)
+    random = np.random.RandomState(0)
+    rays = random.randint(0, 360, 1000)
+    gates = random.randint(0, 360, 1000)
+    values = beam_block.core.blockage_lookup(encoded, rays, gates)
+    assert_array_equal(np.ma.getmaskarray(values),
+                       np.ma.getmaskarray(pbb_existing)[rays, gates])
+    assert_almost_equal(values, pbb_existing[rays, gates], 10)
+
+
+def test_beam_block_flags_encoded():
+    """ Unit test for the beam_block_radar.beam_block_flags function with
+    encoded fields. """
+    pbb_flags, cbb_flags = beam_block.core.beam_block_flags(
+        pbb_existing, cbb_existing)
+    pbb_encoded = beam_block.core.encode_blockage(pbb_existing)
+    cbb_encoded = beam_block.core.encode_blockage(cbb_existing)
+    pbb_flags_encoded, cbb_flags_encoded = beam_block.core.beam_block_flags(
+        pbb_encoded, cbb_encoded)
+
+    pbb_flags_decoded = beam_block.core.decode_blockage(pbb_flags_encoded)
+    cbb_flags_decoded = beam_block.core.decode_blockage(cbb_flags_encoded)
+    valid = ~np.ma.getmaskarray(pbb_existing)
+    assert_array_equal(pbb_flags_decoded[valid], pbb_flags[valid])
+    assert_array_equal(cbb_flags_decoded, cbb_flags)
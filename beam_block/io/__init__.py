@@ -0,0 +1,26 @@
+"""
+=========================
+IO (:mod:`beam_block.io`)
+=========================
+
+.. currentmodule:: beam_block.io
+
+Reading and writing functions for beam block calculations.
+
+IO Functions
+============
+
+.. autosummary::
+    :toctree: generated/
+
+    read_radar_geometry
+    append_beam_block_fields
+    write_beam_block_sidecar
+
+"""
+
+from .cfradial_geometry import read_radar_geometry
+from .cfradial_append import append_beam_block_fields
+from .cfradial_append import write_beam_block_sidecar
+
+__all__ = [s for s in dir() if not s.startswith('_')]
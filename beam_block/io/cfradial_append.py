@@ -0,0 +1,180 @@
+"""
+beam_block.io.cfradial_append
+=============================
+
+Writes beam block fields without rewriting the radar volume. The fields
+are either appended to the source CF/Radial file in place, or written to
+a small sidecar file whose time and range dimensions match the source
+file, so output I/O scales with the beam block fields and not with the
+size of the volume.
+
+.. autosummary::
+    :toctree: generated/
+
+    append_beam_block_fields
+    write_beam_block_sidecar
+
+"""
+
+import os
+
+import netCDF4
+import numpy as np
+import pyart
+
+
+def append_beam_block_fields(filename, fields, zlib=False):
+    """
+    Append beam block fields to an existing CF/Radial file in place.
+
+    Parameters
+    ----------
+    filename : string
+        Name of the CF/Radial netCDF file to append the fields to. It
+        must have time and range dimensions matching the field shapes.
+    fields : dict
+        Dictionary of field names and field dictionaries, such as those
+        created by the dict_config functions. Fields that are already in
+        the file are overwritten. Field data encoded with encode_blockage
+        is written as run variables, see write_beam_block_sidecar, and
+        can not overwrite existing fields.
+
+    Other Parameters
+    ----------------
+    zlib : bool
+        True to compress the new variables. Only supported by netCDF4
+        files. Default is False.
+
+    Note
+    ----
+    Adding variables to a netCDF3 file makes the netCDF library rewrite
+    the file header, which can move the existing data. For large netCDF3
+    volumes write_beam_block_sidecar avoids this.
+
+    """
+    with netCDF4.Dataset(filename, 'a') as dataset:
+        _write_fields(dataset, fields, zlib)
+        if 'field_names' in dataset.ncattrs():
+            field_names = [
+                name.strip() for name in dataset.field_names.split(',')
+                if name.strip()]
+            field_names += [name for name in fields
+                            if name not in field_names]
+            dataset.setncattr('field_names', ', '.join(field_names))
+
+
+def write_beam_block_sidecar(filename, source_file, fields, zlib=True):
+    """
+    Write beam block fields to a sidecar file of a CF/Radial file.
+
+    Parameters
+    ----------
+    filename : string
+        Name of the sidecar netCDF file to create.
+    source_file : string
+        Name of the CF/Radial file the fields belong to. Only its time
+        and range variables are read.
+    fields : dict
+        Dictionary of field names and field dictionaries, such as those
+        created by the dict_config functions. The data can also be
+        encoded with encode_blockage.
+
+    Other Parameters
+    ----------------
+    zlib : bool
+        True to compress the field variables. Default is True.
+
+    Note
+    ----
+    The sidecar has the time and range dimensions and coordinate
+    variables of the source file, so the fields can be matched to the
+    source volume by dimension names, for example with xarray's merge.
+    The source_file global attribute records the source file name.
+
+    An encoded field is written as the name_first_gate variable along
+    time, the name_run_ray, name_run_start, name_run_length and
+    name_run_value variables along the name_run dimension and the
+    name_mask_ray, name_mask_start and name_mask_length variables along
+    the name_mask_run dimension. The field metadata and the fill value of
+    the gates outside the runs are attributes of name_run_value.
+
+    """
+    with netCDF4.Dataset(source_file) as source:
+        coords = {}
+        for name in ['time', 'range']:
+            ncvar = source.variables[name]
+            coords[name] = ({key: ncvar.getncattr(key)
+                             for key in ncvar.ncattrs()
+                             if key != '_FillValue'},
+                            ncvar[:], ncvar.dtype)
+
+    with netCDF4.Dataset(filename, 'w', format='NETCDF4') as dataset:
+        dataset.setncattr('Conventions', 'CF/Radial')
+        dataset.setncattr('source_file', os.path.basename(source_file))
+        for name, (attrs, data, dtype) in coords.items():
+            dataset.createDimension(name, len(data))
+            ncvar = dataset.createVariable(name, dtype, (name, ))
+            ncvar.setncatts(attrs)
+            ncvar[:] = data
+        _write_fields(dataset, fields, zlib)
+
+
+def _write_fields(dataset, fields, zlib):
+    """ Creates or overwrites the field variables along the time and
+    range dimensions of an open netCDF dataset. """
+    shape = (len(dataset.dimensions['time']),
+             len(dataset.dimensions['range']))
+    fill_value = pyart.config.get_fillvalue()
+    for name, field in fields.items():
+        if isinstance(field['data'], dict):
+            _write_encoded_field(dataset, name, field, shape, zlib)
+            continue
+        data = np.ma.masked_invalid(field['data'])
+        if data.shape != shape:
+            raise ValueError(
+                'Field %s shape %s does not match the file shape %s.' % (
+                    name, data.shape, shape))
+        if name in dataset.variables:
+            ncvar = dataset.variables[name]
+        else:
+            ncvar = dataset.createVariable(
+                name, data.dtype, ('time', 'range'), zlib=zlib,
+                fill_value=fill_value)
+        ncvar.setncatts({key: value for key, value in field.items()
+                         if key != 'data'})
+        ncvar[:] = data
+
+
+def _write_encoded_field(dataset, name, field, shape, zlib):
+    """ Creates the run variables of a field encoded with
+    encode_blockage in an open netCDF dataset. """
+    encoded = field['data']
+    if tuple(encoded['shape']) != shape:
+        raise ValueError(
+            'Field %s shape %s does not match the file shape %s.' % (
+                name, tuple(encoded['shape']), shape))
+    if name + '_run_value' in dataset.variables:
+        raise ValueError(
+            'Encoded field %s is already in the file.' % name)
+
+    dataset.createDimension(name + '_run', len(encoded['run_ray']))
+    dataset.createDimension(name + '_mask_run', len(encoded['mask_ray']))
+    variables = [('first_gate', ('time', )),
+                 ('run_ray', (name + '_run', )),
+                 ('run_start', (name + '_run', )),
+                 ('run_length', (name + '_run', )),
+                 ('run_value', (name + '_run', )),
+                 ('mask_ray', (name + '_mask_run', )),
+                 ('mask_start', (name + '_mask_run', )),
+                 ('mask_length', (name + '_mask_run', ))]
+    for key, dims in variables:
+        data = np.asarray(encoded[key])
+        ncvar = dataset.createVariable(
+            name + '_' + key, data.dtype, dims, zlib=zlib)
+        ncvar[:] = data
+
+    ncvar = dataset.variables[name + '_run_value']
+    ncvar.setncatts({key: value for key, value in field.items()
+                     if key != 'data'})
+    ncvar.setncattr('encoding', 'run_length')
+    ncvar.setncattr('fill', encoded['fill'])
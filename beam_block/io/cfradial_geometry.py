@@ -0,0 +1,78 @@
+"""
+beam_block.io.cfradial_geometry
+===============================
+
+Reads only the scan geometry of a CF/Radial file. Beam blockage needs
+the radar location, range gates, ray angles and sweep boundaries, so
+the moment fields, which make up nearly all of a volume, are never read.
+
+.. autosummary::
+    :toctree: generated/
+
+    read_radar_geometry
+
+"""
+
+import netCDF4
+import numpy as np
+import pyart
+
+# Variables needed to georeference every gate of the volume.
+_GEOMETRY_VARIABLES = [
+    'time', 'range', 'latitude', 'longitude', 'altitude', 'azimuth',
+    'elevation', 'sweep_number', 'sweep_mode', 'fixed_angle',
+    'sweep_start_ray_index', 'sweep_end_ray_index']
+
+
+def read_radar_geometry(filename):
+    """
+    Read the scan geometry of a CF/Radial file.
+
+    Parameters
+    ----------
+    filename : string
+        Name of the CF/Radial netCDF file to read.
+
+    Returns
+    -------
+    radar : Radar
+        Radar object with the time, range, location, azimuth, elevation
+        and sweep variables of the file and no fields. This can be used
+        with beam_block in place of a radar read with pyart.io.read.
+
+    """
+    with netCDF4.Dataset(filename) as dataset:
+        variables = {}
+        for name in _GEOMETRY_VARIABLES:
+            ncvar = dataset.variables[name]
+            ncvar.set_auto_mask(False)
+            variables[name] = {
+                key: ncvar.getncattr(key) for key in ncvar.ncattrs()
+                if key != '_FillValue'}
+            variables[name]['data'] = ncvar[:]
+        # The field names of the file do not apply to the fieldless radar.
+        metadata = {key: dataset.getncattr(key)
+                    for key in dataset.ncattrs() if key != 'field_names'}
+
+    # The location is kept as a single value, the same as Py-ART does
+    # for stationary platforms.
+    for name in ['latitude', 'longitude', 'altitude']:
+        variables[name]['data'] = np.atleast_1d(
+            variables[name]['data'])[:1]
+
+    sweep_mode = netCDF4.chartostring(variables['sweep_mode']['data'])
+    if 'scan_type' in metadata:
+        scan_type = metadata.pop('scan_type')
+    elif any('rhi' in str(mode) for mode in sweep_mode):
+        scan_type = 'rhi'
+    else:
+        scan_type = 'ppi'
+
+    return pyart.core.Radar(
+        variables['time'], variables['range'], {}, metadata, scan_type,
+        variables['latitude'], variables['longitude'],
+        variables['altitude'], variables['sweep_number'],
+        variables['sweep_mode'], variables['fixed_angle'],
+        variables['sweep_start_ray_index'],
+        variables['sweep_end_ray_index'], variables['azimuth'],
+        variables['elevation'])
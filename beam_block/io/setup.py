@@ -0,0 +1,13 @@
+""" Setup for IO Subpackages. """
+
+from numpy.distutils.core import setup
+from numpy.distutils.misc_util import Configuration
+
+def configuration(parent_package='', top_path=None):
+    """ Configuration of io subpackages. """
+    config = Configuration('io', parent_package, top_path)
+    config.add_data_dir('tests')
+    return config
+
+if __name__ == '__main__':
+    setup(**configuration(top_path='').todict())
@@ -0,0 +1,82 @@
+""" Unit Tests for Beam Block's io/cfradial_append.py module. """
+
+import os
+import shutil
+import tempfile
+
+import netCDF4
+import pyart
+from numpy.testing import assert_almost_equal
+
+import beam_block
+from beam_block.config import dict_config
+
+
+radar_bb = pyart.io.read(beam_block.testing.SAMPLE_RADAR_BLOCK_DATA_FILE)
+pbb_existing = radar_bb.fields['partial_beam_block']['data']
+cbb_existing = radar_bb.fields['cumulative_beam_block']['data']
+fields = {'partial_beam_block': dict_config.pbb_to_dict(pbb_existing),
+          'cumulative_beam_block': dict_config.cbb_to_dict(cbb_existing)}
+
+
+def test_append_beam_block_fields():
+    """ Unit test for the cfradial_append.append_beam_block_fields
+    function. """
+    tmp_dir = tempfile.mkdtemp()
+    try:
+        filename = os.path.join(tmp_dir, 'radar.nc')
+        shutil.copy(beam_block.testing.SAMPLE_RADAR_NC_FILE, filename)
+        beam_block.io.append_beam_block_fields(filename, fields)
+
+        radar = pyart.io.read(filename)
+        assert_almost_equal(
+            radar.fields['partial_beam_block']['data'], pbb_existing, 5)
+        assert_almost_equal(
+            radar.fields['cumulative_beam_block']['data'], cbb_existing, 5)
+        assert radar.fields['partial_beam_block']['long_name'] == \
+            'Partial Beam Block Fraction'
+    finally:
+        shutil.rmtree(tmp_dir)
+
+
+def test_write_beam_block_sidecar():
+    """ Unit test for the cfradial_append.write_beam_block_sidecar
+    function. """
+    tmp_dir = tempfile.mkdtemp()
+    try:
+        filename = os.path.join(tmp_dir, 'sidecar.nc')
+        source_file = beam_block.testing.SAMPLE_RADAR_NC_FILE
+        beam_block.io.write_beam_block_sidecar(
+            filename, source_file, fields)
+
+        with netCDF4.Dataset(filename) as dataset:
+            assert dataset.source_file == os.path.basename(source_file)
+            assert dataset.variables['partial_beam_block'].dimensions == \
+                ('time', 'range')
+            assert_almost_equal(
+                dataset.variables['cumulative_beam_block'][:],
+                cbb_existing, 5)
+    finally:
+        shutil.rmtree(tmp_dir)
+
+
+def test_write_beam_block_sidecar_encoded():
+    """ Unit test for the cfradial_append.write_beam_block_sidecar
+    function with encoded fields. """
+    tmp_dir = tempfile.mkdtemp()
+    try:
+        filename = os.path.join(tmp_dir, 'sidecar.nc')
+        encoded = beam_block.core.encode_blockage(cbb_existing)
+        beam_block.io.write_beam_block_sidecar(
+            filename, beam_block.testing.SAMPLE_RADAR_NC_FILE,
+            {'cumulative_beam_block': dict_config.cbb_to_dict(encoded)})
+
+        with netCDF4.Dataset(filename) as dataset:
+            run_value = dataset.variables['cumulative_beam_block_run_value']
+            assert run_value.encoding == 'run_length'
+            assert len(run_value) == len(encoded['run_value'])
+            assert_almost_equal(
+                dataset.variables['cumulative_beam_block_first_gate'][:],
+                encoded['first_gate'])
+    finally:
+        shutil.rmtree(tmp_dir)
@@ -0,0 +1,31 @@
+""" Unit Tests for Beam Block's io/cfradial_geometry.py module. """
+
+import pyart
+from numpy.testing import assert_almost_equal
+
+import beam_block
+
+
+def test_read_radar_geometry():
+    """ Unit test for the cfradial_geometry.read_radar_geometry
+    function. """
+    filename = beam_block.testing.SAMPLE_RADAR_BLOCK_DATA_FILE
+    radar = beam_block.io.read_radar_geometry(filename)
+    radar_full = pyart.io.read(filename)
+
+    assert radar.fields == {}
+    assert radar.nrays == radar_full.nrays
+    assert radar.ngates == radar_full.ngates
+    assert radar.nsweeps == radar_full.nsweeps
+    assert radar.scan_type == radar_full.scan_type
+    for name in ['range', 'azimuth', 'elevation', 'latitude', 'longitude',
+                 'altitude', 'sweep_start_ray_index', 'sweep_end_ray_index']:
+        assert_almost_equal(getattr(radar, name)['data'],
+                            getattr(radar_full, name)['data'], 5)
+
+    pbb_existing = radar_full.fields['partial_beam_block']['data']
+    cbb_existing = radar_full.fields['cumulative_beam_block']['data']
+    pbb_all, cbb_all = beam_block.core.beam_block(
+        radar, beam_block.testing.SAMPLE_TIF_FILE, 1.0)
+    assert_almost_equal(pbb_all, pbb_existing, 3)
+    assert_almost_equal(cbb_all, cbb_existing, 3)
@@ -7,6 +7,8 @@ Core (:mod:`beam_block.retrieve`)
 
 Retrieve elevation function for retrieving lowest elevations needed
 for a gate to achieve less than 0.01 CBB fraction.
+Coverage map functions for the minimum visible height above ground on
+a regular grid, for one or several radar sites.
 
 Core Functions
 ==============
@@ -15,9 +17,16 @@ Core Functions
     :toctree: generated/
 
     lowest_elevation_no_blockage
+    adaptive_lowest_elevation_no_blockage
+    resample_lowest_elevation
+    coverage_map
+    composite_coverage_map
 
 """
 
 from .low_el_no_block import lowest_elevation_no_blockage
+from .low_el_no_block import adaptive_lowest_elevation_no_blockage
+from .low_el_no_block import resample_lowest_elevation
+from .coverage_map import coverage_map, composite_coverage_map
 
 __all__ = [s for s in dir() if not s.startswith('_')]
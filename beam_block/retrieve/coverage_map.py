@@ -0,0 +1,287 @@
+"""
+beam_block.retrieve.coverage_map
+================================
+
+Calculates the minimum height above ground the radar can see, directly
+on a regular grid in the projection of the DEM. For each grid tile the
+terrain is sampled along radial profiles covering the tile, the lowest
+elevation angle whose beam clears the terrain is accumulated outwards
+along each profile and the beam height of that elevation is looked up at
+every grid point. Tiles are calculated in parallel and maps of several
+sites can be composited for siting and coverage planning.
+
+.. autosummary::
+    :toctreeL generated/
+    :template: dev_template.rst
+
+    coverage_map
+    composite_coverage_map
+
+"""
+
+from concurrent.futures import ThreadPoolExecutor
+
+import numpy as np
+
+from ..core.beam_block_radar import _read_raster, _interpolate_raster
+from ..core.dem_tiles import is_dem_tiles
+from ..core.georef import polar_to_raster_xy, _beam_terms
+from ..core.georef import _lonlat_to_polar, _raster_to_lonlat
+from ..core.georef import _site_radius
+
+
+def coverage_map(sitecoords, tif_file, beam_width=1.0, max_range=100000.0,
+                 x=None, y=None, grid_spacing=None, range_step=100.0,
+                 min_elevation=0.0, ke=4. / 3., tile_size=256,
+                 max_workers=None):
+    """
+    Minimum Visible Height Coverage Map
+
+    Parameters
+    ----------
+    sitecoords : tuple
+        Longitude, latitude and altitude of the radar.
+    tif_file : string
+        Name of geotiff file to use for the
+        calculation.
+
+    Other Parameters
+    ----------------
+    beam_width : float
+        Radar's beam width for calculation.
+        Default value is 1.0.
+    max_range : float
+        Largest range of the map in meters. Default value is 100000.0.
+    x, y : array
+        Arrays of grid coordinates in the DEM projection, y usually
+        descending. Default is None, which creates a grid covering
+        max_range around the site.
+    grid_spacing : float
+        Spacing of the created grid in units of the DEM projection.
+        Default is None, which uses the DEM pixel size.
+    range_step : float
+        Distance in meters between the terrain samples of the radial
+        profiles. Default value is 100.0.
+    min_elevation : float
+        Lowest elevation angle the radar scans at, in degrees. Default
+        value is 0.0.
+    ke : float
+        Adjustment factor for the effective earth radius. Default
+        value is 4/3.
+    tile_size : int
+        Number of grid points along each side of a tile. Default value
+        is 256.
+    max_workers : int
+        Number of threads calculating tiles. Default is None, which uses
+        the default of concurrent.futures.ThreadPoolExecutor.
+
+    Returns
+    -------
+    height : MaskedArray
+        Array of the minimum visible heights above ground in meters with
+        shape (len(y), len(x)), masked beyond max_range.
+    x, y : array
+        Arrays of the grid coordinates.
+
+    Note
+    ----
+    The minimum visible height is the height of the beam center of the
+    lowest elevation whose lower half power edge clears the terrain all
+    the way from the radar, which is where the CBB fraction becomes
+    zero. This is the gridded counterpart of the beam height at the
+    elevations of lowest_elevation_no_blockage.
+
+    """
+    sitecoords = tuple(float(coord) for coord in sitecoords)
+    return _coverage_map(
+        sitecoords, _read_raster(tif_file, sitecoords, max_range),
+        beam_width, max_range, x, y, grid_spacing, range_step,
+        min_elevation, ke, tile_size, max_workers)
+
+
+def _coverage_map(sitecoords, raster, beam_width=1.0, max_range=100000.0,
+                  x=None, y=None, grid_spacing=None, range_step=100.0,
+                  min_elevation=0.0, ke=4. / 3., tile_size=256,
+                  max_workers=None):
+    """ Calculates the coverage map of a site from an already read
+    raster. """
+    if x is None or y is None:
+        x, y = _site_grid(sitecoords, max_range, raster, grid_spacing)
+
+    height = np.full((len(y), len(x)), np.nan)
+    tiles = [(slice(row, row + tile_size), slice(col, col + tile_size))
+             for row in range(0, len(y), tile_size)
+             for col in range(0, len(x), tile_size)]
+    with ThreadPoolExecutor(max_workers) as executor:
+        futures = []
+        for rows, cols in tiles:
+            futures.append((rows, cols, executor.submit(
+                _tile_coverage, x[cols], y[rows], sitecoords, raster,
+                beam_width, max_range, range_step, min_elevation, ke)))
+        for rows, cols, future in futures:
+            height[rows, cols] = future.result()
+    return np.ma.masked_invalid(height), x, y
+
+
+def composite_coverage_map(sites, tif_file, beam_width=1.0,
+                           max_range=100000.0, grid_spacing=None,
+                           **kwargs):
+    """
+    Composite Minimum Visible Height Coverage Map of several sites.
+
+    Parameters
+    ----------
+    sites : list
+        List of longitude, latitude and altitude tuples of the radars.
+    tif_file : string
+        Name of geotiff file to use for the
+        calculation.
+
+    Other Parameters
+    ----------------
+    beam_width : float
+        Radars' beam width for calculation.
+        Default value is 1.0.
+    max_range : float
+        Largest range of each site in meters. Default value is
+        100000.0.
+    grid_spacing : float
+        Spacing of the grid in units of the DEM projection. Default is
+        None, which uses the DEM pixel size.
+    **kwargs
+        Other keyword arguments of coverage_map.
+
+    Returns
+    -------
+    height : MaskedArray
+        Array of the lowest minimum visible height above ground of all
+        sites in meters, masked where no site reaches.
+    site_index : array
+        Array of the index of the site giving the lowest height at each
+        grid point, -1 where no site reaches.
+    x, y : array
+        Arrays of the grid coordinates, covering max_range around all
+        sites.
+
+    """
+    sites = [tuple(float(coord) for coord in site) for site in sites]
+
+    # A single geotiff is read once for all sites, DEM tiles once per
+    # site as only the tiles around the site are read.
+    if is_dem_tiles(tif_file):
+        rasters = [_read_raster(tif_file, site, max_range)
+                   for site in sites]
+    else:
+        rasters = [_read_raster(tif_file)] * len(sites)
+    bboxes = np.array([_site_bbox(site, max_range, raster[2])
+                       for site, raster in zip(sites, rasters)])
+    bbox = (bboxes[:, 0].min(), bboxes[:, 1].min(),
+            bboxes[:, 2].max(), bboxes[:, 3].max())
+    x, y = _bbox_grid(bbox, rasters[-1], grid_spacing)
+
+    heights = []
+    for site, raster in zip(sites, rasters):
+        height = _coverage_map(
+            site, raster, beam_width, max_range, x, y, **kwargs)[0]
+        heights.append(np.ma.filled(height, np.nan))
+    heights = np.stack(heights)
+    height = np.fmin.reduce(heights, axis=0)
+    reached = np.isfinite(heights).any(axis=0)
+    site_index = np.where(
+        reached, np.argmin(np.where(np.isnan(heights), np.inf, heights),
+                           axis=0), -1)
+    return np.ma.masked_invalid(height), site_index, x, y
+
+
+def _tile_coverage(x, y, sitecoords, raster, beam_width, max_range,
+                   range_step, min_elevation, ke):
+    """ Calculates the minimum visible height above ground at the grid
+    points of one tile. """
+    rastervalues, rastercoords, proj = raster
+    grid_x, grid_y = np.meshgrid(x, y)
+    height = np.full(grid_x.shape, np.nan)
+
+    lon, lat = _raster_to_lonlat(grid_x, grid_y, proj)
+    azimuth, angle = _lonlat_to_polar(lon, lat, sitecoords)
+    re = _site_radius(sitecoords)
+    inside = angle * re <= max_range
+    if not inside.any():
+        return height
+
+    # Profile azimuths covering the tile, spaced about range_step apart
+    # at its farthest point. Tiles around the site need all azimuths.
+    far = angle[inside].max() * re
+    az_step = np.degrees(range_step / max(far, range_step))
+    az_ref = azimuth[inside][0]
+    az_offset = (azimuth - az_ref + 180.0) % 360.0 - 180.0
+    full_circle = np.ptp(az_offset[inside]) > 90.0
+    if full_circle:
+        az_first = 0.0
+        az_size = int(np.ceil(360.0 / az_step))
+        az_step = 360.0 / az_size
+    else:
+        az_first = az_ref + az_offset[inside].min()
+        az_size = int(np.ceil(np.ptp(az_offset[inside]) / az_step)) + 1
+    profile_az = az_first + np.arange(az_size) * az_step
+
+    # Terrain elevation angle at each profile gate, seen from the site
+    # on the effective earth, and the lowest clearing beam elevation.
+    _range = np.arange(1, int(np.ceil(far / range_step)) + 2) * range_step
+    x_pol, y_pol, _ = polar_to_raster_xy(
+        _range, profile_az, np.zeros(az_size), sitecoords, proj, ke)
+    terrain = _interpolate_raster(rastervalues, rastercoords, x_pol, y_pol)
+    gate_angle = _beam_terms(0.0, sitecoords, _range.tobytes(), ke)[1]
+    radius = ke * re
+    ratio = (radius + terrain - sitecoords[2]) / radius
+    phi = gate_angle / ke
+    terrain_elev = np.arctan2(ratio * np.cos(phi) - 1, ratio * np.sin(phi))
+    lowest_elev = np.maximum(
+        np.maximum.accumulate(terrain_elev, axis=1)
+        + np.radians(beam_width) / 2, np.radians(min_elevation))
+
+    # Look up the profile gate at or beyond each grid point.
+    if full_circle:
+        az_index = np.round(azimuth / az_step).astype(int) % az_size
+    else:
+        az_index = np.round(
+            (az_ref + az_offset - az_first) / az_step).astype(int)
+        az_index = np.clip(az_index, 0, az_size - 1)
+    gate_index = np.clip(np.searchsorted(gate_angle, angle), 0,
+                         len(_range) - 1)
+    elev = lowest_elev[az_index, gate_index]
+
+    # Beam height of that elevation above the ground at the grid point.
+    phi = angle / ke
+    cos_ratio = np.cos(elev) / np.cos(elev + phi)
+    beam = np.where(np.cos(elev + phi) > 0, radius * (cos_ratio - 1),
+                    np.nan) + sitecoords[2]
+    ground = _interpolate_raster(rastervalues, rastercoords, grid_x, grid_y)
+    height[inside] = (beam - ground)[inside]
+    return height
+
+
+def _site_bbox(sitecoords, max_range, proj):
+    """ Returns the bounding box of max_range around the site in the
+    DEM projection. """
+    azimuths = np.arange(0.0, 360.0, 1.0)
+    x_edge, y_edge, _ = polar_to_raster_xy(
+        np.array([0.0, max_range]), azimuths, np.zeros(len(azimuths)),
+        sitecoords, proj)
+    return x_edge.min(), y_edge.min(), x_edge.max(), y_edge.max()
+
+
+def _site_grid(sitecoords, max_range, raster, grid_spacing):
+    """ Returns grid coordinates covering max_range around the site. """
+    return _bbox_grid(_site_bbox(sitecoords, max_range, raster[2]),
+                      raster, grid_spacing)
+
+
+def _bbox_grid(bbox, raster, grid_spacing):
+    """ Returns grid coordinates covering the bounding box, with y
+    descending as in north up rasters. """
+    if grid_spacing is None:
+        rastercoords = raster[1]
+        grid_spacing = abs(rastercoords[0, 1, 0] - rastercoords[0, 0, 0])
+    x = np.arange(bbox[0], bbox[2] + grid_spacing / 2, grid_spacing)
+    y = np.arange(bbox[3], bbox[1] - grid_spacing / 2, -grid_spacing)
+    return x, y
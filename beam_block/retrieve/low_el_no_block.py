@@ -10,9 +10,14 @@ Calculates the lowest elevation needed to achieve less than
     :template: dev_template.rst
 
     lowest_elevation_no_blockage
+    adaptive_lowest_elevation_no_blockage
+    resample_lowest_elevation
 
 """
 
+import json
+import os
+
 import numpy as np
 import pyart
 
@@ -22,7 +27,8 @@ from ..core import beam_block
 def lowest_elevation_no_blockage(radar, tif_file, beam_width=1.0,
                                  az_start=0.0, az_end=360.0, az_size=360,
                                  elev_start=0.0, elev_end=90.0,
-                                 elev_size=90):
+                                 elev_size=90, checkpoint_file=None,
+                                 verbose=False):
     """
     Lowest Elevation No Blockage Calculation
 
@@ -56,6 +62,17 @@ def lowest_elevation_no_blockage(radar, tif_file, beam_width=1.0,
     elev_size : int
         Number of elevation values between elev_start and elev_end.
         Default value is 90.
+    checkpoint_file : string
+        Name of a .npy file the result of each azimuth is written to as
+        soon as it is calculated. If the file exists, azimuths already
+        in it are not calculated again, so an interrupted calculation
+        can be resumed by calling the function again with the same
+        arguments. The arguments are saved next to it in checkpoint_file
+        + '.json' and a ValueError is raised when they differ on resume.
+        Default is None, which keeps the results in memory.
+    verbose : bool
+        True to print the progress after each azimuth. Default is False.
+
     Returns
     -------
     low_el_not_blocked_all : array
@@ -71,49 +88,257 @@ def lowest_elevation_no_blockage(radar, tif_file, beam_width=1.0,
     the calculation up.
 
     """
+    azimuths = np.linspace(az_start, az_end, az_size)
+    elevations = np.linspace(elev_start, elev_end, elev_size)
+    shape = (az_size, radar.ngates)
+
+    # Azimuths that are not calculated yet are NaN in the output.
+    if checkpoint_file is None:
+        low_el_not_blocked_all = np.full(shape, np.nan)
+    else:
+        # The checkpoint only holds results of the same calculation.
+        params = json.loads(json.dumps(_checkpoint_params(
+            radar, tif_file, beam_width, az_start, az_end, az_size,
+            elev_start, elev_end, elev_size)))
+        params_file = checkpoint_file + '.json'
+        if os.path.exists(checkpoint_file):
+            _check_checkpoint_params(checkpoint_file, params_file, params)
+            low_el_not_blocked_all = np.lib.format.open_memmap(
+                checkpoint_file, mode='r+')
+            if low_el_not_blocked_all.shape != shape:
+                raise ValueError(
+                    'Checkpoint file %s has shape %s, expected %s.' % (
+                        checkpoint_file, low_el_not_blocked_all.shape,
+                        shape))
+        else:
+            with open(params_file, 'w') as fh:
+                json.dump(params, fh, indent=2, sort_keys=True)
+            # The new file is only moved into place once it is NaN
+            # filled, so an interrupted start never leaves zeros that
+            # look like finished azimuths.
+            tmp_file = checkpoint_file + '.tmp'
+            tmp = np.lib.format.open_memmap(
+                tmp_file, mode='w+', dtype='float64', shape=shape)
+            tmp[:] = np.nan
+            tmp.flush()
+            del tmp
+            os.replace(tmp_file, checkpoint_file)
+            low_el_not_blocked_all = np.lib.format.open_memmap(
+                checkpoint_file, mode='r+')
+
+    remaining = np.flatnonzero(
+        np.isnan(low_el_not_blocked_all).any(axis=1))
+    for count, i in enumerate(remaining):
+        low_el_not_blocked_all[i] = _azimuth_lowest_elevation(
+            radar, tif_file, beam_width, azimuths[i], elevations)
+        if checkpoint_file is not None:
+            low_el_not_blocked_all.flush()
+        if verbose:
+            print('## Azimuth %.2f done, %d of %d remaining azimuths' % (
+                azimuths[i], count + 1, len(remaining)))
+    return np.array(low_el_not_blocked_all)
+
+
+def adaptive_lowest_elevation_no_blockage(radar, tif_file, beam_width=1.0,
+                                          az_start=0.0, az_end=360.0,
+                                          az_size=37, elev_start=0.0,
+                                          elev_end=90.0, elev_size=90,
+                                          tolerance=1.0,
+                                          min_az_spacing=0.1,
+                                          verbose=False):
+    """
+    Lowest Elevation No Blockage Calculation with adaptive azimuths.
+
+    A coarse pass is calculated at az_size evenly spaced azimuths, then
+    the midpoint between two neighbouring azimuths is added wherever
+    their lowest elevations differ by more than tolerance at any gate,
+    until the neighbours agree or are min_az_spacing apart. Fine azimuth
+    spacing is therefore only used near terrain edges.
+
+    Parameters
+    ----------
+    radar : Radar
+        Radar object used.
+    tif_file : string
+        Name of geotiff file to use for the
+        calculation.
+
+    Other Parameters
+    ----------------
+    beam_width : float
+        Radar's beam width for calculation.
+        Default value is 1.0.
+    az_start : float
+        Azimuth to start calculation at. Default is 0.0 degrees.
+    az_end: float
+        Azimuth to end calculation at. Default is 360.0 degrees.
+    az_size: int
+        Number of azimuth values of the coarse pass between az_start
+        and az_end. Default is 37, which is 10 degree spacing.
+    elev_start : float
+        Elevation angle to start the calculation at. Default value is
+        0.0.
+    elev_end : float
+        Elevation angle to end the calculation at. Default value is
+        90.0.
+    elev_size : int
+        Number of elevation values between elev_start and elev_end.
+        Default value is 90.
+    tolerance : float
+        Largest difference in degrees between the lowest elevations of
+        neighbouring azimuths that is not refined. Default value is 1.0.
+    min_az_spacing : float
+        Azimuths are not refined below this spacing in degrees. Default
+        value is 0.1.
+    verbose : bool
+        True to print the progress after each refinement pass. Default
+        is False.
+
+    Returns
+    -------
+    azimuths : array
+        Array of the sorted, unevenly spaced azimuths that were
+        calculated.
+    low_el_not_blocked_all : array
+        Array of elevation angles for the azimuths when less than 0.01
+        CBB fraction is achieved.
+
+    See Also
+    --------
+    resample_lowest_elevation : Resample the result to regular azimuths.
 
-    # Define needed values for the temporary rhi radar.
-    low_el_list = []
+    """
+    elevations = np.linspace(elev_start, elev_end, elev_size)
     azimuths = np.linspace(az_start, az_end, az_size)
-    ngates = radar.ngates
+    low_el = np.array([
+        _azimuth_lowest_elevation(
+            radar, tif_file, beam_width, azimuth, elevations)
+        for azimuth in azimuths])
+
+    # Each pass bisects all neighbour intervals that disagree, until
+    # none are left.
+    while True:
+        differ = np.abs(np.diff(low_el, axis=0)).max(axis=1) > tolerance
+        differ &= np.diff(azimuths) / 2.0 >= min_az_spacing
+        if not differ.any():
+            break
+        new_azimuths = (azimuths[:-1][differ] + azimuths[1:][differ]) / 2.0
+        new_low_el = np.array([
+            _azimuth_lowest_elevation(
+                radar, tif_file, beam_width, azimuth, elevations)
+            for azimuth in new_azimuths])
+        azimuths = np.concatenate((azimuths, new_azimuths))
+        low_el = np.concatenate((low_el, new_low_el))
+        order = np.argsort(azimuths)
+        azimuths = azimuths[order]
+        low_el = low_el[order]
+        if verbose:
+            print('## Refined %d azimuth intervals, %d azimuths '
+                  'calculated' % (len(new_azimuths), len(azimuths)))
+    return azimuths, low_el
+
+
+def resample_lowest_elevation(azimuths, low_el_not_blocked_all,
+                              grid_azimuths):
+    """
+    Resample lowest elevations at uneven azimuths to other azimuths.
+
+    Parameters
+    ----------
+    azimuths : array
+        Array of sorted azimuths of the lowest elevations, such as those
+        returned by adaptive_lowest_elevation_no_blockage.
+    low_el_not_blocked_all : array
+        Array of lowest elevation angles with shape (azimuths, gates).
+    grid_azimuths : array
+        Array of azimuths to resample to, for example
+        np.linspace(0.0, 360.0, 3601) for a regular 0.1 degree grid.
+
+    Returns
+    -------
+    low_el_grid : array
+        Array of lowest elevation angles with shape
+        (grid_azimuths, gates), linearly interpolated in azimuth. Grid
+        azimuths outside the calculated azimuths take the value of the
+        nearest end.
+
+    """
+    azimuths = np.asarray(azimuths)
+    grid_azimuths = np.asarray(grid_azimuths)
+    right = np.clip(np.searchsorted(azimuths, grid_azimuths), 1,
+                    len(azimuths) - 1)
+    left = right - 1
+    weight = np.clip((grid_azimuths - azimuths[left])
+                     / (azimuths[right] - azimuths[left]), 0.0, 1.0)
+    return (low_el_not_blocked_all[left] * (1.0 - weight[:, np.newaxis])
+            + low_el_not_blocked_all[right] * weight[:, np.newaxis])
+
+
+def _checkpoint_params(radar, tif_file, beam_width, az_start, az_end,
+                       az_size, elev_start, elev_end, elev_size):
+    """ Returns the arguments of lowest_elevation_no_blockage that
+    determine the results in a checkpoint file. """
     _range = radar.range['data']
-    lat = radar.latitude['data']
-    lon = radar.longitude['data']
-    alt = radar.altitude['data']
-
-    # Take all azimuths and create an rhi for each slice to
-    # calculate all elevations at all gates.
-    for azimuth in azimuths:
-        rhi_radar = pyart.testing.make_empty_rhi_radar(
-            ngates, elev_size, 1)
-        rhi_radar.latitude['data'] = lat
-        rhi_radar.longitude['data'] = lon
-        rhi_radar.altitude['data'] = alt
-        rhi_radar.range['data'] = _range
-        rhi_radar.elevation['data'] = np.linspace(
-            elev_start, elev_end, elev_size)
-        rhi_radar.azimuth['data'] = np.array([azimuth] * elev_size)
-
-        # Calculate beam blockage using the values from the rhi radar.
-        cbb = beam_block(rhi_radar, tif_file, beam_width)[1]
-
-        # Finds the minimum elevation at each gate by taking all the
-        # above gates and when less than 0.01 CBB fraction is achieved
-        # that gates index is matched with the elevation index to obtain
-        # elevation and puts it into an array.
-        not_blocked_lowest = []
-        shape = (1, ngates)
-        one_az = np.ones(shape)
-        for i in range(len(_range)):
-            not_blocked = np.argwhere(cbb[:, i] < 0.01)
-            not_blocked_lowest.append(not_blocked.min())
-            one_az[0, i] = rhi_radar.elevation[
-                'data'][not_blocked_lowest[i]]
-        # Puts all the elevation data into a list.
-        low_el_list.append(one_az)
-
-        # Deletes the rhi radar after it is used to save memory.
-        del rhi_radar
-    # Puts all the elevations from each azimuth together.
-    low_el_not_blocked_all = np.concatenate(low_el_list)
-    return low_el_not_blocked_all
+    return {
+        'tif_file': os.path.abspath(tif_file),
+        'beam_width': float(beam_width),
+        'az_start': float(az_start),
+        'az_end': float(az_end),
+        'az_size': int(az_size),
+        'elev_start': float(elev_start),
+        'elev_end': float(elev_end),
+        'elev_size': int(elev_size),
+        'longitude': float(np.ravel(radar.longitude['data'])[0]),
+        'latitude': float(np.ravel(radar.latitude['data'])[0]),
+        'altitude': float(np.ravel(radar.altitude['data'])[0]),
+        'ngates': int(radar.ngates),
+        'range_start': float(_range[0]),
+        'range_end': float(_range[-1])}
+
+
+def _check_checkpoint_params(checkpoint_file, params_file, params):
+    """ Raises a ValueError when the checkpoint file was written with
+    other arguments than params. """
+    if not os.path.exists(params_file):
+        raise ValueError(
+            'Checkpoint file %s has no parameter file %s.' % (
+                checkpoint_file, params_file))
+    with open(params_file) as fh:
+        saved = json.load(fh)
+    differ = sorted(key for key in set(saved) | set(params)
+                    if saved.get(key) != params.get(key))
+    if differ:
+        raise ValueError(
+            'Checkpoint file %s was calculated with other %s: %s, '
+            'expected %s.' % (
+                checkpoint_file, ', '.join(differ),
+                [saved.get(key) for key in differ],
+                [params.get(key) for key in differ]))
+
+
+def _azimuth_lowest_elevation(radar, tif_file, beam_width, azimuth,
+                              elevations):
+    """ Calculates the lowest elevation with less than 0.01 CBB fraction
+    at each gate of a single azimuth, using an rhi through all of the
+    elevations. """
+    elev_size = len(elevations)
+    rhi_radar = pyart.testing.make_empty_rhi_radar(
+        radar.ngates, elev_size, 1)
+    rhi_radar.latitude['data'] = radar.latitude['data']
+    rhi_radar.longitude['data'] = radar.longitude['data']
+    rhi_radar.altitude['data'] = radar.altitude['data']
+    rhi_radar.range['data'] = radar.range['data']
+    rhi_radar.elevation['data'] = elevations
+    rhi_radar.azimuth['data'] = np.array([azimuth] * elev_size)
+
+    # Calculate beam blockage using the values from the rhi radar.
+    cbb = beam_block(rhi_radar, tif_file, beam_width)[1]
+
+    # The lowest elevation at each gate is the first elevation index
+    # where less than 0.01 CBB fraction is achieved.
+    not_blocked = cbb < 0.01
+    if not np.all(not_blocked.any(axis=0)):
+        raise ValueError(
+            'No elevation has less than 0.01 CBB fraction at some gates '
+            'of azimuth %.2f.' % azimuth)
+    return elevations[np.argmax(not_blocked, axis=0)]
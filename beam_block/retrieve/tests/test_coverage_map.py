@@ -0,0 +1,60 @@
+""" Unit Tests for Beam Block's retrieve/coverage_map.py module. """
+
+import numpy as np
+import pyart
+from numpy.testing import assert_almost_equal
+
+import beam_block
+
+
+def test_coverage_map():
+    """ Unit test for the coverage_map.coverage_map function. """
+    radar = pyart.io.read(beam_block.testing.SAMPLE_RADAR_NC_FILE)
+    tif_file = beam_block.testing.SAMPLE_TIF_FILE
+    sitecoords = (radar.longitude['data'][0], radar.latitude['data'][0],
+                  radar.altitude['data'][0])
+
+    height, x, y = beam_block.retrieve.coverage_map(
+        sitecoords, tif_file, 1.0, max_range=30000.0, grid_spacing=500.0,
+        tile_size=32)
+    assert height.shape == (len(y), len(x))
+    assert np.all(np.diff(x) > 0)
+    assert np.all(np.diff(y) < 0)
+    # Corners of the grid are beyond the range.
+    assert height.mask[0, 0] and height.mask[-1, -1]
+    assert height.count() > 0
+
+    # Tiles give the same result as a single tile, up to the azimuth
+    # spacing of the profiles.
+    height_one_tile = beam_block.retrieve.coverage_map(
+        sitecoords, tif_file, 1.0, max_range=30000.0, x=x, y=y,
+        tile_size=len(x) + len(y), range_step=25.0)[0]
+    assert np.ma.median(np.abs(height - height_one_tile)) < 50.0
+
+    # The beam can not clear the terrain below the horizon.
+    higher = beam_block.retrieve.coverage_map(
+        sitecoords, tif_file, 1.0, max_range=30000.0, x=x, y=y,
+        min_elevation=2.0)[0]
+    assert np.all(higher >= height - 1e-6)
+
+
+def test_composite_coverage_map():
+    """ Unit test for the coverage_map.composite_coverage_map
+    function. """
+    radar = pyart.io.read(beam_block.testing.SAMPLE_RADAR_NC_FILE)
+    tif_file = beam_block.testing.SAMPLE_TIF_FILE
+    sitecoords = (radar.longitude['data'][0], radar.latitude['data'][0],
+                  radar.altitude['data'][0])
+    other_site = (sitecoords[0] + 0.1, sitecoords[1], sitecoords[2])
+
+    height, site_index, x, y = beam_block.retrieve.composite_coverage_map(
+        [sitecoords, other_site], tif_file, 1.0, max_range=20000.0,
+        grid_spacing=500.0)
+    assert height.shape == site_index.shape == (len(y), len(x))
+    assert set(np.unique(site_index)) <= {-1, 0, 1}
+    assert np.all(height.mask == (site_index == -1))
+
+    single = beam_block.retrieve.coverage_map(
+        sitecoords, tif_file, 1.0, max_range=20000.0, x=x, y=y)[0]
+    assert np.all(height[~single.mask] <= single[~single.mask] + 1e-6)
+    assert_almost_equal(height[site_index == 0], single[site_index == 0])
@@ -1,7 +1,12 @@
 """ Unit Tests for Beam Block's retrieve/low_el_no_block.py module. """
 
+import os
+import shutil
+import tempfile
+
+import numpy as np
 import pyart
-from numpy.testing import assert_almost_equal
+from numpy.testing import assert_almost_equal, assert_raises
 
 import beam_block
 
@@ -28,3 +33,81 @@ def test_lowest_elevation_no_blockage():
         elev_end, elev_size)
 
     assert_almost_equal(low_el_not_blocked_all, low_el_existing, 3)
+
+
+def test_lowest_elevation_no_blockage_checkpoint():
+    """ Unit test for resuming the low_el_no_block.lowest_elevation_no_blockage
+    function from a checkpoint file. """
+    radar = pyart.io.read(beam_block.testing.SAMPLE_RADAR_NC_FILE)
+    tif_file = beam_block.testing.SAMPLE_TIF_FILE
+
+    tmp_dir = tempfile.mkdtemp()
+    checkpoint_file = os.path.join(tmp_dir, 'low_el.npy')
+    try:
+        low_el = beam_block.retrieve.lowest_elevation_no_blockage(
+            radar, tif_file, az_start=0.0, az_end=90.0, az_size=4,
+            checkpoint_file=checkpoint_file)
+        assert_almost_equal(np.load(checkpoint_file), low_el)
+        assert os.path.exists(checkpoint_file + '.json')
+        assert not os.path.exists(checkpoint_file + '.tmp')
+
+        # Azimuths in the checkpoint are not calculated again, while
+        # unfinished azimuths are.
+        checkpoint = np.load(checkpoint_file)
+        checkpoint[0] = 45.0
+        checkpoint[1] = np.nan
+        np.save(checkpoint_file, checkpoint)
+        low_el_resumed = beam_block.retrieve.lowest_elevation_no_blockage(
+            radar, tif_file, az_start=0.0, az_end=90.0, az_size=4,
+            checkpoint_file=checkpoint_file)
+        assert np.all(low_el_resumed[0] == 45.0)
+        assert_almost_equal(low_el_resumed[1:], low_el[1:])
+
+        # A checkpoint of another calculation is not resumed.
+        assert_raises(
+            ValueError, beam_block.retrieve.lowest_elevation_no_blockage,
+            radar, tif_file, beam_width=2.0, az_start=0.0, az_end=90.0,
+            az_size=4, checkpoint_file=checkpoint_file)
+        assert_raises(
+            ValueError, beam_block.retrieve.lowest_elevation_no_blockage,
+            radar, tif_file, az_start=10.0, az_end=100.0, az_size=4,
+            checkpoint_file=checkpoint_file)
+    finally:
+        shutil.rmtree(tmp_dir)
+
+
+def test_adaptive_lowest_elevation_no_blockage():
+    """ Unit test for the
+    low_el_no_block.adaptive_lowest_elevation_no_blockage and
+    low_el_no_block.resample_lowest_elevation functions. """
+    radar = pyart.io.read(beam_block.testing.SAMPLE_RADAR_NC_FILE)
+    tif_file = beam_block.testing.SAMPLE_TIF_FILE
+
+    azimuths, low_el = (
+        beam_block.retrieve.adaptive_lowest_elevation_no_blockage(
+            radar, tif_file, az_start=0.0, az_end=40.0, az_size=3,
+            tolerance=1.0, min_az_spacing=2.5))
+    assert np.all(np.diff(azimuths) > 0)
+    assert np.all(np.diff(azimuths) >= 2.5)
+    assert np.all(np.in1d([0.0, 20.0, 40.0], azimuths))
+    assert low_el.shape == (len(azimuths), radar.ngates)
+
+    # Neighbours that are not refined agree within the tolerance.
+    refinable = np.diff(azimuths) >= 5.0
+    assert np.all(
+        np.abs(np.diff(low_el, axis=0)).max(axis=1)[refinable] <= 1.0)
+
+    # Each azimuth matches the uniform calculation.
+    low_el_uniform = beam_block.retrieve.lowest_elevation_no_blockage(
+        radar, tif_file, az_start=azimuths[1], az_end=azimuths[1],
+        az_size=1)
+    assert_almost_equal(low_el[1:2], low_el_uniform)
+
+    low_el_grid = beam_block.retrieve.resample_lowest_elevation(
+        azimuths, low_el, azimuths)
+    assert_almost_equal(low_el_grid, low_el)
+    low_el_grid = beam_block.retrieve.resample_lowest_elevation(
+        azimuths, low_el, np.linspace(0.0, 40.0, 41))
+    assert low_el_grid.shape == (41, radar.ngates)
+    assert np.all(low_el_grid >= low_el.min())
+    assert np.all(low_el_grid <= low_el.max())
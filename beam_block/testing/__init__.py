@@ -19,11 +19,24 @@ Testing Files
     SAMPLE_RADAR_BLOCK_DATA_FILE
     SAMPLE_RADAR_LOW_ELEV_FILE
 
+Validation Functions
+====================
+
+.. autosummary::
+    :toctree: generated/
+
+    blockage_error_stats
+    validate_beam_block
+    assert_validation
+    validation_report_to_string
+
 """
 
 from .sample_files import SAMPLE_TIF_FILE
 from .sample_files import SAMPLE_RADAR_NC_FILE, SAMPLE_RADAR_JSON_FILE
 from .sample_files import SAMPLE_RADAR_BLOCK_DATA_FILE
 from .sample_files import SAMPLE_RADAR_LOW_ELEV_FILE
+from .validation import blockage_error_stats, validate_beam_block
+from .validation import assert_validation, validation_report_to_string
 
 __all__ = [s for s in dir() if not s.startswith('_')]
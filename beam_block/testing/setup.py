@@ -7,6 +7,7 @@ def configuration(parent_package='', top_path=None):
     """ Configuration of testing subpackages. """
     config = Configuration('testing', parent_package, top_path)
     config.add_data_dir('data')
+    config.add_data_dir('tests')
     return config
 
 if __name__ == '__main__':
@@ -0,0 +1,70 @@
+""" Unit Tests for Beam Block's testing/validation.py module. """
+
+import numpy as np
+import pyart
+from numpy.testing import assert_almost_equal, assert_raises
+
+import beam_block
+from beam_block.testing import validation
+
+
+radar_bb = pyart.io.read(beam_block.testing.SAMPLE_RADAR_BLOCK_DATA_FILE)
+pbb_existing = radar_bb.fields['partial_beam_block']['data']
+cbb_existing = radar_bb.fields['cumulative_beam_block']['data']
+
+
+def test_blockage_error_stats():
+    """ Unit test for the validation.blockage_error_stats function. """
+    stats = validation.blockage_error_stats(
+        pbb_existing, cbb_existing, pbb_existing, cbb_existing)
+    assert_almost_equal(stats['pbb_max_error'], 0.0, 6)
+    assert_almost_equal(stats['cbb_max_error'], 0.0, 6)
+    assert_almost_equal(stats['pbb_flag_disagreement'], 0.0, 6)
+    assert_almost_equal(stats['cbb_flag_disagreement'], 0.0, 6)
+    assert stats['pbb_gates_compared'] > 0
+
+    cbb_shifted = np.ma.clip(cbb_existing + 0.02, 0, 1)
+    stats = validation.blockage_error_stats(
+        pbb_existing, cbb_shifted, pbb_existing, cbb_existing)
+    assert stats['cbb_max_error'] <= 0.02 + 1e-6
+    assert stats['cbb_mean_error'] > 0.0
+    assert_almost_equal(stats['pbb_max_error'], 0.0, 6)
+    assert_raises(AssertionError, validation.assert_validation,
+                  stats, max_error=0.01)
+
+
+def test_validate_beam_block():
+    """ Unit test for the validation.validate_beam_block function. """
+    radar = pyart.io.read(beam_block.testing.SAMPLE_RADAR_NC_FILE)
+    tif_file = beam_block.testing.SAMPLE_TIF_FILE
+
+    report = validation.validate_beam_block(
+        radar, tif_file, mode_kwargs={'beam_width': 1.0},
+        reference_kwargs={'beam_width': 1.0},
+        pbb_ref=pbb_existing, cbb_ref=cbb_existing)
+    validation.assert_validation(report, max_error=2e-3)
+    assert report['speedup'] > 0.0
+    assert 'Speedup' in validation.validation_report_to_string(report)
+
+
+def test_validate_beam_block_approximation():
+    """ Unit test for the validation.validate_beam_block function gating
+    approximate beam block modes. """
+    radar = pyart.io.read(beam_block.testing.SAMPLE_RADAR_NC_FILE)
+    tif_file = beam_block.testing.SAMPLE_TIF_FILE
+
+    report = validation.validate_beam_block(
+        radar, tif_file, mode_kwargs={'dem_pyramid': True},
+        pbb_ref=pbb_existing, cbb_ref=cbb_existing)
+    assert report['cbb_mean_error'] < 0.05
+
+    # The preview also returns the CBB error estimate as a third output.
+    report = validation.validate_beam_block(
+        radar, tif_file, mode=beam_block.core.preview_beam_block,
+        mode_kwargs={'ray_step': 2, 'gate_step': 2},
+        pbb_ref=pbb_existing, cbb_ref=cbb_existing)
+    validation.assert_validation(
+        report, max_error=1.0, mean_error=0.05, max_flag_disagreement=0.15)
+    assert_raises(AssertionError, validation.assert_validation,
+                  report, max_error=1.0, mean_error=0.01,
+                  max_flag_disagreement=0.15)
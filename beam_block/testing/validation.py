@@ -0,0 +1,258 @@
+"""
+beam_block.testing.validation
+=============================
+
+Accuracy versus speed validation of beam block calculations.
+
+Functions that run a configured beam block calculation, such as a faster
+approximation, against a reference beam block output and report the
+speedup alongside PBB, CBB and flag error statistics. The report can be
+used as a test gate with assert_validation or printed with
+validation_report_to_string.
+
+.. autosummary::
+    :toctree: generated/
+
+    blockage_error_stats
+    validate_beam_block
+    assert_validation
+    validation_report_to_string
+
+"""
+
+import copy
+import time
+
+import numpy as np
+
+from ..core import beam_block, beam_block_flags
+
+
+def blockage_error_stats(pbb_all, cbb_all, pbb_ref, cbb_ref,
+                         no_block_thresh=0.01, complete_block_thresh=0.95):
+    """
+    Error statistics of PBB and CBB arrays against reference arrays.
+
+    Parameters
+    ----------
+    pbb_all : array
+        Array of partial beam block fractions to be validated.
+    cbb_all : array
+        Array of cumulative beam block fractions to be validated.
+    pbb_ref : array
+        Reference array of partial beam block fractions.
+    cbb_ref : array
+        Reference array of cumulative beam block fractions.
+
+    Other Parameters
+    ----------------
+    no_block_thresh : float
+        Value for the cutoff for no blockage flag value of 0, used when
+        comparing flag classes. Default value is 0.01.
+    complete_block_thresh : float
+        Value for the cutoff for complete blockage flag value of 2, used
+        when comparing flag classes. Default value is 0.95.
+
+    Returns
+    -------
+    stats : dict
+        Dictionary of the maximum and mean absolute PBB and CBB errors,
+        the fraction of gates whose PBB and CBB flag classes disagree
+        and the number of gates compared. Only gates that are valid in
+        both the validated and the reference arrays are compared.
+
+    """
+    pbb_all = np.ma.masked_invalid(pbb_all)
+    cbb_all = np.ma.masked_invalid(cbb_all)
+    pbb_ref = np.ma.masked_invalid(pbb_ref)
+    cbb_ref = np.ma.masked_invalid(cbb_ref)
+    if pbb_all.shape != pbb_ref.shape or cbb_all.shape != cbb_ref.shape:
+        raise ValueError(
+            'Shapes do not match the reference: %s and %s against %s '
+            'and %s.' % (pbb_all.shape, cbb_all.shape, pbb_ref.shape,
+                         cbb_ref.shape))
+
+    pbb_flags, cbb_flags = beam_block_flags(
+        pbb_all, cbb_all, no_block_thresh, complete_block_thresh)
+    pbb_flags_ref, cbb_flags_ref = beam_block_flags(
+        pbb_ref, cbb_ref, no_block_thresh, complete_block_thresh)
+
+    stats = {}
+    for name, data, ref, flags, flags_ref in (
+            ('pbb', pbb_all, pbb_ref, pbb_flags, pbb_flags_ref),
+            ('cbb', cbb_all, cbb_ref, cbb_flags, cbb_flags_ref)):
+        valid = ~(np.ma.getmaskarray(data) | np.ma.getmaskarray(ref))
+        error = np.abs(np.ma.getdata(data)[valid]
+                       - np.ma.getdata(ref)[valid])
+        disagree = (np.ma.getdata(flags)[valid]
+                    != np.ma.getdata(flags_ref)[valid])
+        if error.size:
+            stats[name + '_max_error'] = float(error.max())
+            stats[name + '_mean_error'] = float(error.mean())
+            stats[name + '_flag_disagreement'] = float(disagree.mean())
+        else:
+            stats[name + '_max_error'] = np.nan
+            stats[name + '_mean_error'] = np.nan
+            stats[name + '_flag_disagreement'] = np.nan
+        stats[name + '_gates_compared'] = int(valid.sum())
+    return stats
+
+
+def _timed_run(func, radar, tif_file, kwargs, repeat):
+    """ Runs a beam block function on copies of the radar and returns
+    the PBB and CBB arrays of the last run, taken from the first two
+    outputs of the function, and the fastest run time in seconds. """
+    best = np.inf
+    for _ in range(repeat):
+        # Beam block functions clear the radar fields, so each run
+        # works on its own copy.
+        radar_copy = copy.deepcopy(radar)
+        start = time.perf_counter()
+        output = func(radar_copy, tif_file, **kwargs)
+        best = min(best, time.perf_counter() - start)
+    return output[0], output[1], best
+
+
+def validate_beam_block(radar, tif_file, mode=None, mode_kwargs=None,
+                        reference=None, reference_kwargs=None,
+                        pbb_ref=None, cbb_ref=None, repeat=1,
+                        no_block_thresh=0.01, complete_block_thresh=0.95):
+    """
+    Validate a beam block mode against a reference beam block calculation.
+
+    Parameters
+    ----------
+    radar : Radar
+        Radar object used.
+    tif_file : string
+        Name of geotiff file to use for the calculation.
+
+    Other Parameters
+    ----------------
+    mode : function
+        Beam block function to validate, called as
+        mode(radar, tif_file, **mode_kwargs) and returning the PBB and CBB
+        arrays as its first two outputs, so functions returning more,
+        such as preview_beam_block, can be validated directly. Default
+        is beam_block.
+    mode_kwargs : dict
+        Keyword arguments passed to mode, for example the beam_width.
+    reference : function
+        Reference beam block function, called the same way as mode. It is
+        always run so the speedup can be reported. Default is beam_block.
+    reference_kwargs : dict
+        Keyword arguments passed to reference. Default is no keyword
+        arguments, so the beam_width should be given here as well when
+        it is not the default.
+    pbb_ref, cbb_ref : array
+        Reference PBB and CBB arrays, for example from the
+        SAMPLE_RADAR_BLOCK_DATA_FILE. When given the errors are calculated
+        against these instead of the output of reference.
+    repeat : int
+        Number of times each calculation is run. The fastest run time is
+        reported. Default is 1.
+    no_block_thresh : float
+        Value for the cutoff for no blockage flag value of 0. Default
+        value is 0.01.
+    complete_block_thresh : float
+        Value for the cutoff for complete blockage flag value of 2.
+        Default value is 0.95.
+
+    Returns
+    -------
+    report : dict
+        Dictionary with the error statistics from blockage_error_stats,
+        the run times of mode and reference in seconds and the speedup of
+        mode over reference.
+
+    """
+    if mode is None:
+        mode = beam_block
+    if reference is None:
+        reference = beam_block
+    if mode_kwargs is None:
+        mode_kwargs = {}
+    if reference_kwargs is None:
+        reference_kwargs = {}
+
+    pbb_all, cbb_all, mode_time = _timed_run(
+        mode, radar, tif_file, mode_kwargs, repeat)
+    pbb_run, cbb_run, reference_time = _timed_run(
+        reference, radar, tif_file, reference_kwargs, repeat)
+    if pbb_ref is None:
+        pbb_ref = pbb_run
+    if cbb_ref is None:
+        cbb_ref = cbb_run
+
+    report = blockage_error_stats(
+        pbb_all, cbb_all, pbb_ref, cbb_ref,
+        no_block_thresh=no_block_thresh,
+        complete_block_thresh=complete_block_thresh)
+    report['mode_time'] = mode_time
+    report['reference_time'] = reference_time
+    report['speedup'] = reference_time / mode_time
+    return report
+
+
+def assert_validation(report, max_error=0.01, mean_error=None,
+                      max_flag_disagreement=0.01, min_speedup=None):
+    """
+    Raise an AssertionError when a validation report is out of tolerance.
+
+    Parameters
+    ----------
+    report : dict
+        Report created by validate_beam_block or the statistics from
+        blockage_error_stats.
+
+    Other Parameters
+    ----------------
+    max_error : float
+        Largest allowed maximum absolute PBB and CBB error. Default value
+        is 0.01.
+    mean_error : float
+        Largest allowed mean absolute PBB and CBB error. Default is None,
+        which does not check the mean error.
+    max_flag_disagreement : float
+        Largest allowed fraction of gates where the PBB or CBB flag class
+        disagrees with the reference. Default value is 0.01.
+    min_speedup : float
+        Smallest allowed speedup over the reference. Default is None,
+        which does not check the speedup.
+
+    """
+    failures = []
+    for name in ('pbb', 'cbb'):
+        checks = [(name + '_max_error', max_error),
+                  (name + '_mean_error', mean_error),
+                  (name + '_flag_disagreement', max_flag_disagreement)]
+        for key, limit in checks:
+            # The comparison is written so NaN values also fail.
+            if limit is not None and not report[key] <= limit:
+                failures.append('%s of %g exceeds %g' % (
+                    key, report[key], limit))
+    if min_speedup is not None and not report['speedup'] >= min_speedup:
+        failures.append('speedup of %g is below %g' % (
+            report['speedup'], min_speedup))
+    if failures:
+        raise AssertionError(
+            'Beam block validation failed: ' + '; '.join(failures))
+
+
+def validation_report_to_string(report):
+    """ Function that takes a validation report and turns
+    it into a string table to be printed. """
+    lines = []
+    if 'speedup' in report:
+        lines.append('Mode time:       %10.3f s' % report['mode_time'])
+        lines.append('Reference time:  %10.3f s' % report['reference_time'])
+        lines.append('Speedup:         %10.2f x' % report['speedup'])
+    lines.append('%-8s %12s %12s %12s %10s' % (
+        'Field', 'Max error', 'Mean error', 'Flag diff', 'Gates'))
+    for name in ('pbb', 'cbb'):
+        lines.append('%-8s %12.5f %12.5f %11.3f%% %10d' % (
+            name.upper(), report[name + '_max_error'],
+            report[name + '_mean_error'],
+            100.0 * report[name + '_flag_disagreement'],
+            report[name + '_gates_compared']))
+    return '\n'.join(lines)